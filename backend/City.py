@@ -5,87 +5,122 @@ This module implements a weighted graph representing the city map with:
 - Custom adjacency list structure (no built-in graph libraries)
 - Zone/sector division
 - Dijkstra's shortest path algorithm from scratch
+- All-pairs shortest path cache for repeated dispatch queries
 """
 
 from typing import Dict, List, Tuple, Optional
+from array import array
 import math
+import sys
 
 
 class MinHeap:
     """
     Custom min-heap implementation for Dijkstra's algorithm.
     Stores (distance, node_id) tuples and extracts minimum distance.
+    
+    With track_positions=False the heap skips decrease-key bookkeeping and
+    accepts duplicate node entries, for lazy-deletion style searches.
     """
     
-    def __init__(self):
+    # One heap is built per search, so skip the per-instance __dict__
+    __slots__ = ("_heap", "_positions")
+    
+    def __init__(self, track_positions: bool = True):
         self._heap: List[Tuple[float, str]] = []
-        self._positions: Dict[str, int] = {}  # Track node positions for decrease-key
+        # Track node positions for decrease-key
+        self._positions: Optional[Dict[str, int]] = {} if track_positions else None
     
     def is_empty(self) -> bool:
-        return len(self._heap) == 0
-    
-    def _parent(self, i: int) -> int:
-        return (i - 1) // 2
+        return not self._heap
     
-    def _left_child(self, i: int) -> int:
-        return 2 * i + 1
+    def __len__(self) -> int:
+        return len(self._heap)
     
-    def _right_child(self, i: int) -> int:
-        return 2 * i + 2
-    
-    def _swap(self, i: int, j: int) -> None:
-        """Swap elements and update position tracking."""
-        self._positions[self._heap[i][1]] = j
-        self._positions[self._heap[j][1]] = i
-        self._heap[i], self._heap[j] = self._heap[j], self._heap[i]
+    # Sifts move a "hole" instead of swapping: entries on the way are
+    # shifted one level and the moving entry is written once at the end
     
     def _heapify_up(self, i: int) -> None:
         """Restore heap property upward from index i."""
-        while i > 0 and self._heap[i][0] < self._heap[self._parent(i)][0]:
-            self._swap(i, self._parent(i))
-            i = self._parent(i)
+        heap = self._heap
+        positions = self._positions
+        item = heap[i]
+        distance = item[0]
+        
+        while i > 0:
+            parent = (i - 1) >> 1
+            above = heap[parent]
+            if distance >= above[0]:
+                break
+            heap[i] = above
+            if positions is not None:
+                positions[above[1]] = i
+            i = parent
+        
+        heap[i] = item
+        if positions is not None:
+            positions[item[1]] = i
     
     def _heapify_down(self, i: int) -> None:
         """Restore heap property downward from index i."""
-        smallest = i
-        left = self._left_child(i)
-        right = self._right_child(i)
+        heap = self._heap
+        positions = self._positions
+        size = len(heap)
+        item = heap[i]
+        distance = item[0]
+        child = 2 * i + 1
         
-        if left < len(self._heap) and self._heap[left][0] < self._heap[smallest][0]:
-            smallest = left
-        if right < len(self._heap) and self._heap[right][0] < self._heap[smallest][0]:
-            smallest = right
+        while child < size:
+            # Pick the smaller child
+            right = child + 1
+            if right < size and heap[right][0] < heap[child][0]:
+                child = right
+            below = heap[child]
+            if below[0] >= distance:
+                break
+            heap[i] = below
+            if positions is not None:
+                positions[below[1]] = i
+            i = child
+            child = 2 * i + 1
         
-        if smallest != i:
-            self._swap(i, smallest)
-            self._heapify_down(smallest)
+        heap[i] = item
+        if positions is not None:
+            positions[item[1]] = i
     
     def insert(self, distance: float, node_id: str) -> None:
         """Insert a new (distance, node) pair into the heap."""
-        self._heap.append((distance, node_id))
-        self._positions[node_id] = len(self._heap) - 1
-        self._heapify_up(len(self._heap) - 1)
+        heap = self._heap
+        heap.append((distance, node_id))
+        self._heapify_up(len(heap) - 1)
+    
+    def peek_min(self) -> Tuple[float, str]:
+        """Return the minimum distance element without removing it."""
+        if self.is_empty():
+            raise IndexError("Heap is empty")
+        return self._heap[0]
     
     def extract_min(self) -> Tuple[float, str]:
         """Remove and return the minimum distance element."""
-        if self.is_empty():
+        heap = self._heap
+        if not heap:
             raise IndexError("Heap is empty")
         
-        min_elem = self._heap[0]
-        del self._positions[min_elem[1]]
+        # Move the last entry into the root's place and sift it down
+        last = heap.pop()
+        min_elem = heap[0] if heap else last
+        if self._positions is not None:
+            del self._positions[min_elem[1]]
         
-        if len(self._heap) > 1:
-            self._heap[0] = self._heap.pop()
-            self._positions[self._heap[0][1]] = 0
+        if heap:
+            heap[0] = last
             self._heapify_down(0)
-        else:
-            self._heap.pop()
         
         return min_elem
     
     def decrease_key(self, node_id: str, new_distance: float) -> None:
         """Decrease the distance value for a given node."""
-        if node_id not in self._positions:
+        if not self._positions or node_id not in self._positions:
             return
         
         i = self._positions[node_id]
@@ -95,7 +130,415 @@ class MinHeap:
     
     def contains(self, node_id: str) -> bool:
         """Check if node is in the heap."""
-        return node_id in self._positions
+        return self._positions is not None and node_id in self._positions
+
+
+def _dijkstra_csr(
+    indptr: array,
+    indices: array,
+    weights: array,
+    source: int,
+    limit: float = math.inf
+) -> Tuple[List[float], List[int]]:
+    """
+    Single-source Dijkstra's algorithm over CSR arrays.
+    Implemented from scratch without external libraries.
+    
+    Kept as a standalone function over the CSR arrays so the inner loop only
+    touches local variables (no attribute lookups per relaxation).
+    
+    Args:
+        indptr: Row offsets; neighbors of u live in [indptr[u], indptr[u+1])
+        indices: Neighbor node indices
+        weights: Edge weights parallel to indices
+        source: Index of the source node
+        limit: Stop exploring past this distance; nodes farther away are
+            left at infinity
+    
+    Returns:
+        Tuple of (distances, predecessors) indexed by node index
+    """
+    n = len(indptr) - 1
+    
+    # Initialize distances and predecessors
+    distances = [math.inf] * n
+    predecessors = [-1] * n
+    distances[source] = 0
+    
+    # Lazy deletion: push duplicate entries instead of decrease-key
+    heap = MinHeap(track_positions=False)
+    push = heap.insert
+    pop = heap.extract_min
+    is_empty = heap.is_empty
+    push(0, source)
+    
+    while not is_empty():
+        current_dist, current_node = pop()
+        
+        # Skip stale entries superseded by a shorter push
+        if current_dist > distances[current_node]:
+            continue
+        
+        # Everything left in the heap is beyond the bound
+        if current_dist > limit:
+            break
+        
+        # Relax all edges from current node
+        for k in range(indptr[current_node], indptr[current_node + 1]):
+            neighbor = indices[k]
+            new_dist = current_dist + weights[k]
+            
+            if new_dist < distances[neighbor] and new_dist <= limit:
+                distances[neighbor] = new_dist
+                predecessors[neighbor] = current_node
+                push(new_dist, neighbor)
+    
+    return distances, predecessors
+
+
+def _floyd_warshall_csr(
+    indptr: array,
+    indices: array,
+    weights: array
+) -> Tuple[List[List[float]], List[List[int]]]:
+    """
+    All-pairs shortest paths by Floyd-Warshall over CSR arrays.
+    
+    O(V^3) regardless of edge count, but the inner loop is a flat scan of
+    two rows with no heap, so it wins over V single-source searches on
+    small dense graphs.
+    
+    Args:
+        indptr: Row offsets; neighbors of u live in [indptr[u], indptr[u+1])
+        indices: Neighbor node indices
+        weights: Edge weights parallel to indices
+    
+    Returns:
+        Tuple of (distances, predecessors) as one row per source node index;
+        predecessors[s][t] is the node before t on the path from s
+    """
+    n = len(indptr) - 1
+    inf = math.inf
+    distances = [[inf] * n for _ in range(n)]
+    predecessors = [[-1] * n for _ in range(n)]
+    
+    for u in range(n):
+        row = distances[u]
+        pred = predecessors[u]
+        row[u] = 0
+        for k in range(indptr[u], indptr[u + 1]):
+            v = indices[k]
+            if v != u and weights[k] < row[v]:
+                row[v] = weights[k]
+                pred[v] = u
+    
+    nodes = range(n)
+    for via in nodes:
+        via_row = distances[via]
+        via_pred = predecessors[via]
+        for u in nodes:
+            row = distances[u]
+            to_via = row[via]
+            if to_via == inf or u == via:
+                continue
+            pred = predecessors[u]
+            for v in nodes:
+                candidate = to_via + via_row[v]
+                if candidate < row[v]:
+                    row[v] = candidate
+                    pred[v] = via_pred[v]
+    
+    return distances, predecessors
+
+
+def _delta_stepping_csr(
+    light: Tuple[array, array, array],
+    heavy: Tuple[array, array, array],
+    source: int,
+    delta: float
+) -> Tuple[List[float], List[int]]:
+    """
+    Single-source shortest paths by delta-stepping (Meyer & Sanders).
+    
+    Nodes are kept in buckets of width delta by tentative distance instead of
+    a heap. The lowest bucket is emptied by repeatedly relaxing light edges
+    (weight <= delta), which can only refill that same bucket, then heavy
+    edges of everything settled in it are relaxed once. Bucket operations are
+    plain list appends, which is cheaper in Python than heap sifting.
+    
+    Args:
+        light: (indptr, indices, weights) CSR arrays of edges with weight <= delta
+        heavy: The same arrays for edges with weight > delta
+        source: Index of the source node
+        delta: Bucket width
+    
+    Returns:
+        Tuple of (distances, predecessors) indexed by node index
+    """
+    light_ptr, light_idx, light_w = light
+    heavy_ptr, heavy_idx, heavy_w = heavy
+    n = len(light_ptr) - 1
+    
+    distances = [math.inf] * n
+    predecessors = [-1] * n
+    distances[source] = 0
+    
+    buckets: Dict[int, List[int]] = {0: [source]}
+    current = 0
+    
+    while buckets:
+        while current not in buckets:
+            current += 1
+        frontier = buckets.pop(current)
+        settled = []
+        
+        # Light-edge phases until the bucket stops refilling
+        while frontier:
+            next_frontier = []
+            for u in frontier:
+                du = distances[u]
+                # Stale entry: node has since moved to an earlier bucket
+                if du // delta != current:
+                    continue
+                settled.append(u)
+                
+                for k in range(light_ptr[u], light_ptr[u + 1]):
+                    v = light_idx[k]
+                    new_dist = du + light_w[k]
+                    if new_dist < distances[v]:
+                        distances[v] = new_dist
+                        predecessors[v] = u
+                        b = int(new_dist // delta)
+                        if b == current:
+                            next_frontier.append(v)
+                        elif b in buckets:
+                            buckets[b].append(v)
+                        else:
+                            buckets[b] = [v]
+            frontier = next_frontier
+        
+        # Heavy edges always land in a later bucket, so relax them once
+        for u in settled:
+            du = distances[u]
+            for k in range(heavy_ptr[u], heavy_ptr[u + 1]):
+                v = heavy_idx[k]
+                new_dist = du + heavy_w[k]
+                if new_dist < distances[v]:
+                    distances[v] = new_dist
+                    predecessors[v] = u
+                    b = int(new_dist // delta)
+                    if b in buckets:
+                        buckets[b].append(v)
+                    else:
+                        buckets[b] = [v]
+    
+    return distances, predecessors
+
+
+def _bidirectional_dijkstra_csr(
+    forward: Tuple[array, array, array],
+    backward: Tuple[array, array, array],
+    source: int,
+    target: int,
+    limit: float = math.inf,
+    buffers: Optional[Tuple[List[float], List[float], List[int], List[int]]] = None
+) -> Tuple[float, List[int]]:
+    """
+    Point-to-point Dijkstra searching from both ends until the frontiers meet.
+    
+    Each step expands the smaller frontier. Every relaxed edge that reaches a
+    node already labelled by the other search is a candidate meeting point;
+    the search stops once the two heap minimums together cannot beat the best
+    candidate.
+    
+    Args:
+        forward: (indptr, indices, weights) CSR arrays of the graph
+        backward: The same arrays for the reversed graph
+        source: Index of the start node
+        target: Index of the end node
+        limit: Give up once every remaining route is longer than this
+        buffers: Optional preallocated (forward distances, backward distances,
+            forward predecessors, backward predecessors), sized to the graph
+            and filled with infinity / -1. Only the entries a search touches
+            are written, and they are reset before returning, so repeated
+            queries skip the O(V) initialization.
+    
+    Returns:
+        Tuple of (distance, path as node indices); (infinity, []) if no path
+        exists within the limit
+    """
+    if source == target:
+        return 0.0, [source]
+    
+    if buffers is None:
+        n = len(forward[0]) - 1
+        buffers = ([math.inf] * n, [math.inf] * n, [-1] * n, [-1] * n)
+    
+    graphs = (forward, backward)
+    distances = (buffers[0], buffers[1])
+    predecessors = (buffers[2], buffers[3])
+    touched = [source, target]
+    heaps = (MinHeap(track_positions=False), MinHeap(track_positions=False))
+    
+    distances[0][source] = 0
+    distances[1][target] = 0
+    heaps[0].insert(0, source)
+    heaps[1].insert(0, target)
+    
+    best = math.inf
+    meeting = -1
+    
+    while not heaps[0].is_empty() and not heaps[1].is_empty():
+        # No unexplored route can be shorter than the two frontiers combined
+        frontier = heaps[0].peek_min()[0] + heaps[1].peek_min()[0]
+        if frontier >= best or frontier > limit:
+            break
+        
+        side = 0 if len(heaps[0]) <= len(heaps[1]) else 1
+        current_dist, current_node = heaps[side].extract_min()
+        
+        dist = distances[side]
+        pred = predecessors[side]
+        other = distances[1 - side]
+        
+        # Skip stale entries superseded by a shorter push
+        if current_dist > dist[current_node]:
+            continue
+        
+        indptr, indices, weights = graphs[side]
+        for k in range(indptr[current_node], indptr[current_node + 1]):
+            neighbor = indices[k]
+            new_dist = current_dist + weights[k]
+            
+            if new_dist < dist[neighbor]:
+                dist[neighbor] = new_dist
+                pred[neighbor] = current_node
+                heaps[side].insert(new_dist, neighbor)
+                touched.append(neighbor)
+            
+            # Route through this edge into the other search's tree
+            total = new_dist + other[neighbor]
+            if total < best:
+                best = total
+                meeting = neighbor
+    
+    path: List[int] = []
+    if meeting == -1 or best > limit:
+        best = math.inf
+    else:
+        # Stitch the two half-paths together at the meeting node
+        current = meeting
+        while current != -1:
+            path.append(current)
+            current = predecessors[0][current]
+        path.reverse()
+        
+        current = predecessors[1][meeting]
+        while current != -1:
+            path.append(current)
+            current = predecessors[1][current]
+    
+    # Hand the buffers back clean for the next query
+    dist_fwd, dist_bwd = distances
+    pred_fwd, pred_bwd = predecessors
+    for node in touched:
+        dist_fwd[node] = math.inf
+        dist_bwd[node] = math.inf
+        pred_fwd[node] = -1
+        pred_bwd[node] = -1
+    
+    return best, path
+
+
+def _astar_csr(
+    indptr: array,
+    indices: array,
+    weights: array,
+    xs: array,
+    ys: array,
+    scale: float,
+    source: int,
+    target: int,
+    limit: float,
+    distances: List[float],
+    predecessors: List[int]
+) -> Tuple[float, List[int]]:
+    """
+    Point-to-point A* search guided by straight-line distance to the target.
+    
+    The heuristic is h(v) = scale * |v - target|. With scale no larger than
+    any edge's weight / straight-line length, h never overestimates, so the
+    first time the target is popped its distance is final.
+    
+    Args:
+        indptr, indices, weights: CSR arrays of the graph
+        xs, ys: Node coordinates by node index
+        scale: Heuristic multiplier (see above)
+        source: Index of the start node
+        target: Index of the end node
+        limit: Give up once every remaining route is longer than this
+        distances: Preallocated work list filled with infinity; entries the
+            search writes are reset before returning
+        predecessors: Preallocated work list filled with -1, reset likewise
+    
+    Returns:
+        Tuple of (distance, path as node indices); (infinity, []) if no path
+        exists within the limit
+    """
+    target_x = xs[target]
+    target_y = ys[target]
+    
+    def heuristic(node: int) -> float:
+        return scale * math.hypot(xs[node] - target_x, ys[node] - target_y)
+    
+    heap = MinHeap(track_positions=False)
+    touched = [source]
+    distances[source] = 0
+    heap.insert(heuristic(source), source)
+    found = False
+    
+    while not heap.is_empty():
+        current_f, current_node = heap.extract_min()
+        current_dist = distances[current_node]
+        
+        # Skip stale entries superseded by a shorter push
+        if current_f > current_dist + heuristic(current_node):
+            continue
+        
+        # f never overestimates, so nothing left can come in under the limit
+        if current_f > limit:
+            break
+        
+        if current_node == target:
+            found = True
+            break
+        
+        for k in range(indptr[current_node], indptr[current_node + 1]):
+            neighbor = indices[k]
+            new_dist = current_dist + weights[k]
+            
+            if new_dist < distances[neighbor]:
+                distances[neighbor] = new_dist
+                predecessors[neighbor] = current_node
+                heap.insert(new_dist + heuristic(neighbor), neighbor)
+                touched.append(neighbor)
+    
+    best = math.inf
+    path: List[int] = []
+    if found and distances[target] <= limit:
+        best = distances[target]
+        current = target
+        while current != -1:
+            path.append(current)
+            current = predecessors[current]
+        path.reverse()
+    
+    # Hand the buffers back clean for the next query
+    for node in touched:
+        distances[node] = math.inf
+        predecessors[node] = -1
+    
+    return best, path
 
 
 class Node:
@@ -103,6 +546,8 @@ class Node:
     Represents a location/intersection in the city.
     """
     
+    __slots__ = ("node_id", "name", "zone", "x", "y")
+    
     def __init__(self, node_id: str, name: str, zone: str, x: float = 0, y: float = 0):
         self.node_id = node_id
         self.name = name
@@ -126,6 +571,8 @@ class Edge:
     Represents a road between two locations.
     """
     
+    __slots__ = ("from_node", "to_node", "distance")
+    
     def __init__(self, from_node: str, to_node: str, distance: float):
         self.from_node = from_node
         self.to_node = to_node
@@ -146,18 +593,102 @@ class City:
     
     Uses custom adjacency list structure without built-in graph libraries.
     Supports zone-based organization and shortest path computation.
+    
+    Point-to-point searches use their own work arrays and may run from
+    several threads. Queries still fill shared caches, and mutations are
+    not synchronized. A City shared between threads should therefore be
+    used behind a lock, as RideShareSystem does.
     """
     
-    def __init__(self, name: str = "Default City"):
+    # Search algorithms available for building the all-pairs cache
+    APSP_METHODS = ("dijkstra", "delta-stepping", "floyd-warshall")
+    # Single-query results kept per graph version before the memo is reset
+    PAIR_CACHE_SIZE = 4096
+    # Per-target distance maps kept, least recently used dropped first;
+    # each one holds an entry for every node
+    DIST_TO_CACHE_SIZE = 64
+    
+    def __init__(
+        self,
+        name: str = "Default City",
+        optimize_locality: bool = False,
+        metric: bool = False
+    ):
+        """
+        Initialize an empty city.
+        
+        Args:
+            name: City name
+            optimize_locality: Renumber nodes with reverse Cuthill-McKee when
+                packing the CSR arrays, so neighbors sit close in memory.
+                Only pays off on large graphs.
+            metric: Node coordinates reflect road geometry (roads are never
+                much shorter than the straight line between their ends), so
+                point-to-point queries can use A* with a straight-line
+                heuristic. Coordinates and distances may use different units.
+        """
         self.name = name
+        self._optimize_locality = optimize_locality
+        self._metric = metric
         # Custom adjacency list: node_id -> list of (neighbor_id, distance)
         self._adjacency: Dict[str, List[Tuple[str, float]]] = {}
         # Node storage: node_id -> Node object
         self._nodes: Dict[str, Node] = {}
         # Zone mapping: zone_name -> list of node_ids
         self._zones: Dict[str, List[str]] = {}
+        # Flat node_id -> zone map so get_zone is a single dict lookup
+        self._zone_of: Dict[str, str] = {}
         # Edge list for visualization
         self._edges: List[Edge] = []
+        # Directed arc (u, v) -> the road that currently sets its weight; a
+        # two-way road owns both of its arcs
+        self._edge_map: Dict[Tuple[str, str], Edge] = {}
+        
+        # Compressed sparse row (CSR) copy of the adjacency list over integer
+        # node indices: neighbors of node i are _indices[_indptr[i]:_indptr[i+1]]
+        # Stored as typed arrays so each entry is a packed machine value
+        self._ids: List[str] = []
+        self._index: Dict[str, int] = {}
+        self._indptr = array('i', [0])
+        self._indices = array('i')
+        self._weights = array('d')
+        # Reversed graph in the same layout, for backward searches
+        self._rindptr = array('i', [0])
+        self._rindices = array('i')
+        self._rweights = array('d')
+        # Node coordinates by index and the A* heuristic multiplier
+        # (0 disables A*), rebuilt with the CSR
+        self._xs = array('d')
+        self._ys = array('d')
+        self._heuristic_scale = 0.0
+        # Free list of reusable work arrays for point-to-point searches, sized
+        # with the CSR. A search pops a set for its duration, so concurrent
+        # queries never write the same arrays
+        self._search_buffers: List[Tuple[List[float], List[float], List[int], List[int]]] = []
+        
+        # All-pairs shortest path cache indexed by node index:
+        # _dist[source][target] and _pred[source][target] (-1 = no predecessor)
+        # Rows are cleared after the graph is mutated and each one is
+        # recomputed by a single-source search the first time it is needed
+        self._dist: List[Optional[array]] = []
+        self._pred: List[Optional[array]] = []
+        self._rows_cached = 0
+        # Light/heavy edge split for delta-stepping, made once per graph version
+        self._delta_split: Optional[Tuple[float, tuple, tuple]] = None
+        # Per-target distance maps (column of the cache), built on demand,
+        # in least to most recently used order
+        self._dist_to: Dict[str, Dict[str, float]] = {}
+        # Memoized single-query results: (start, end) -> (distance, path)
+        self._pair_cache: Dict[Tuple[str, str], Tuple[float, List[int]]] = {}
+        self._apsp_method = "delta-stepping"
+        self._dirty = True
+        self._csr_dirty = True
+        # Bumped on every graph mutation so callers can invalidate their caches
+        self._version = 0
+        
+        # Serialized form of the graph, reused until the graph changes
+        self._serialized: Optional[dict] = None
+        self._serialized_version = -1
     
     def add_node(self, node_id: str, name: str, zone: str, x: float = 0, y: float = 0) -> Node:
         """
@@ -175,8 +706,13 @@ class City:
         if node_id in self._nodes:
             raise ValueError(f"Node {node_id} already exists")
         
+        # Interned IDs and zone names compare by identity in the dispatch
+        # hot path and in every table keyed by them
+        node_id = sys.intern(node_id)
+        zone = sys.intern(zone)
         node = Node(node_id, name, zone, x, y)
         self._nodes[node_id] = node
+        self._zone_of[node_id] = zone
         self._adjacency[node_id] = []
         
         # Add to zone mapping
@@ -184,12 +720,20 @@ class City:
             self._zones[zone] = []
         self._zones[zone].append(node_id)
         
+        self._dirty = True
+        self._csr_dirty = True
+        self._version += 1
         return node
     
     def add_edge(self, from_node: str, to_node: str, distance: float, bidirectional: bool = True) -> None:
         """
         Add a road between two locations.
         
+        Adding a road that already exists updates its distance instead of
+        creating a parallel edge. A road that overrides a direction of an
+        existing one takes that direction over: a two-way road left with one
+        direction becomes a one-way road, and one left with none is removed.
+        
         Args:
             from_node: Source node ID
             to_node: Destination node ID
@@ -203,11 +747,50 @@ class City:
         if distance < 0:
             raise ValueError("Distance cannot be negative")
         
-        self._adjacency[from_node].append((to_node, distance))
-        self._edges.append(Edge(from_node, to_node, distance))
-        
+        self._set_arc(from_node, to_node, distance)
         if bidirectional:
-            self._adjacency[to_node].append((from_node, distance))
+            self._set_arc(to_node, from_node, distance)
+        
+        arc = (from_node, to_node)
+        reverse = (to_node, from_node)
+        arcs = (arc, reverse) if bidirectional and from_node != to_node else (arc,)
+        edge = self._edge_map.get(arc)
+        # The same road again: it owns exactly the arcs being written
+        if edge is not None and (len(arcs) == 2) == (
+            reverse != arc and self._edge_map.get(reverse) is edge
+        ):
+            edge.distance = distance
+        else:
+            edge = Edge(from_node, to_node, distance)
+            for key in arcs:
+                owner = self._edge_map.get(key)
+                if owner is not None:
+                    self._release_arc(owner, key)
+                self._edge_map[key] = edge
+            self._edges.append(edge)
+        
+        self._dirty = True
+        self._csr_dirty = True
+        self._version += 1
+    
+    def _release_arc(self, edge: Edge, arc: Tuple[str, str]) -> None:
+        """Take one directed arc away from the road that owned it."""
+        del self._edge_map[arc]
+        reverse = (arc[1], arc[0])
+        if reverse != arc and self._edge_map.get(reverse) is edge:
+            # A two-way road keeps only the opposite direction
+            edge.from_node, edge.to_node = reverse
+        else:
+            self._edges.remove(edge)
+    
+    def _set_arc(self, from_node: str, to_node: str, distance: float) -> None:
+        """Set the weight of the directed arc from_node -> to_node, adding it if new."""
+        arcs = self._adjacency[from_node]
+        for i, (neighbor, _) in enumerate(arcs):
+            if neighbor == to_node:
+                arcs[i] = (to_node, distance)
+                return
+        arcs.append((to_node, distance))
     
     def get_node(self, node_id: str) -> Optional[Node]:
         """Get a node by ID."""
@@ -215,8 +798,7 @@ class City:
     
     def get_zone(self, node_id: str) -> Optional[str]:
         """Get the zone of a node."""
-        node = self._nodes.get(node_id)
-        return node.zone if node else None
+        return self._zone_of.get(node_id)
     
     def get_nodes_in_zone(self, zone: str) -> List[str]:
         """Get all node IDs in a zone."""
@@ -234,85 +816,384 @@ class City:
         """Get all edges in the city."""
         return self._edges
     
+    def get_version(self) -> int:
+        """Get a counter that changes whenever nodes or edges are added."""
+        return self._version
+    
     def get_neighbors(self, node_id: str) -> List[Tuple[str, float]]:
         """Get all neighbors of a node with distances."""
         return self._adjacency.get(node_id, [])
     
-    def shortest_path(self, start: str, end: str) -> Tuple[List[str], float]:
+    def _rebuild_csr(self) -> None:
         """
-        Find the shortest path between two nodes using Dijkstra's algorithm.
-        Implemented from scratch without external libraries.
+        Pack the adjacency list into CSR arrays keyed by integer node index.
+        Searches then walk flat typed arrays instead of string-keyed dicts.
+        """
+        if self._optimize_locality:
+            self._ids = self._reverse_cuthill_mckee()
+        else:
+            self._ids = list(self._nodes)
+        self._index = {node_id: i for i, node_id in enumerate(self._ids)}
         
-        Args:
-            start: Starting node ID
-            end: Ending node ID
+        indptr = array('i', [0])
+        indices = array('i')
+        weights = array('d')
         
-        Returns:
-            Tuple of (path as list of node IDs, total distance)
-            Returns ([], infinity) if no path exists
+        reverse: List[List[Tuple[int, float]]] = [[] for _ in self._ids]
+        
+        for i, node_id in enumerate(self._ids):
+            for neighbor, edge_weight in self._adjacency[node_id]:
+                j = self._index[neighbor]
+                indices.append(j)
+                weights.append(edge_weight)
+                reverse[j].append((i, edge_weight))
+            indptr.append(len(indices))
+        
+        self._indptr = indptr
+        self._indices = indices
+        self._weights = weights
+        
+        rindptr = array('i', [0])
+        rindices = array('i')
+        rweights = array('d')
+        
+        for edges in reverse:
+            for neighbor, edge_weight in edges:
+                rindices.append(neighbor)
+                rweights.append(edge_weight)
+            rindptr.append(len(rindices))
+        
+        self._rindptr = rindptr
+        self._rindices = rindices
+        self._rweights = rweights
+        
+        self._search_buffers = []
+        
+        if self._metric:
+            self._xs = array('d', (self._nodes[node_id].x for node_id in self._ids))
+            self._ys = array('d', (self._nodes[node_id].y for node_id in self._ids))
+            self._heuristic_scale = self._compute_heuristic_scale()
+        
+        self._csr_dirty = False
+    
+    def _compute_heuristic_scale(self) -> float:
         """
-        if start not in self._nodes:
-            raise ValueError(f"Start node {start} does not exist")
-        if end not in self._nodes:
-            raise ValueError(f"End node {end} does not exist")
+        Largest factor s with weight >= s * straight-line length on every road.
         
-        # Initialize distances and predecessors
-        distances: Dict[str, float] = {}
-        predecessors: Dict[str, Optional[str]] = {}
-        visited: Dict[str, bool] = {}
+        Summed along any path this gives distance >= s * |start - end|, so
+        s * straight-line distance is an admissible, consistent A* heuristic.
+        Returns 0 (no heuristic) if coordinates carry no usable information.
+        """
+        scale = math.inf
         
-        for node_id in self._nodes:
-            distances[node_id] = math.inf
-            predecessors[node_id] = None
-            visited[node_id] = False
+        for u in range(len(self._ids)):
+            for k in range(self._indptr[u], self._indptr[u + 1]):
+                v = self._indices[k]
+                length = math.hypot(self._xs[u] - self._xs[v], self._ys[u] - self._ys[v])
+                if length > 0:
+                    scale = min(scale, self._weights[k] / length)
         
-        distances[start] = 0
+        return 0.0 if scale == math.inf else scale
+    
+    def _reverse_cuthill_mckee(self) -> List[str]:
+        """
+        Order nodes with the reverse Cuthill-McKee heuristic.
         
-        # Use custom min-heap for efficient extraction
-        heap = MinHeap()
-        heap.insert(0, start)
+        Breadth-first search from a minimum-degree node, visiting neighbors in
+        increasing degree order, then reverse the result. This keeps the index
+        gap between neighbors small, which tightens memory locality of the CSR
+        arrays during Dijkstra.
         
-        while not heap.is_empty():
-            current_dist, current_node = heap.extract_min()
-            
-            if visited[current_node]:
+        Returns:
+            Node IDs in RCM order
+        """
+        # Roads may be one-way; order on the symmetric structure
+        neighbors: Dict[str, set] = {node_id: set() for node_id in self._nodes}
+        for node_id, edges in self._adjacency.items():
+            for neighbor, _ in edges:
+                if neighbor != node_id:
+                    neighbors[node_id].add(neighbor)
+                    neighbors[neighbor].add(node_id)
+        
+        degree = {node_id: len(adjacent) for node_id, adjacent in neighbors.items()}
+        
+        order: List[str] = []
+        visited = set()
+        
+        # Start each connected component from its lowest-degree node
+        for start in sorted(self._nodes, key=degree.get):
+            if start in visited:
                 continue
             
-            visited[current_node] = True
-            
-            # Early termination if we reached the destination
-            if current_node == end:
-                break
+            visited.add(start)
+            queue = [start]
+            head = 0
             
-            # Relax all edges from current node
-            for neighbor, edge_weight in self._adjacency[current_node]:
-                if visited[neighbor]:
-                    continue
+            while head < len(queue):
+                current = queue[head]
+                head += 1
                 
-                new_dist = current_dist + edge_weight
-                
-                if new_dist < distances[neighbor]:
-                    distances[neighbor] = new_dist
-                    predecessors[neighbor] = current_node
-                    
-                    if heap.contains(neighbor):
-                        heap.decrease_key(neighbor, new_dist)
-                    else:
-                        heap.insert(new_dist, neighbor)
+                for neighbor in sorted(neighbors[current] - visited, key=degree.get):
+                    visited.add(neighbor)
+                    queue.append(neighbor)
+            
+            order.extend(queue)
         
-        # Reconstruct path
-        if distances[end] == math.inf:
-            return [], math.inf
+        order.reverse()
+        return order
+    
+    def build_apsp(self, method: str = "delta-stepping") -> None:
+        """
+        Precompute all-pairs shortest paths now, one search per source.
+        
+        The city graph is small and mostly static, so dispatch queries become
+        O(1) table lookups until the next add_node/add_edge. Later rebuilds
+        after graph changes reuse the chosen method.
+        
+        Args:
+            method: "delta-stepping" (bucket-based; the default, several
+                times faster in pure Python), "dijkstra" (heap-based) or
+                "floyd-warshall" (whole table in one O(V^3) pass)
+        """
+        if method not in self.APSP_METHODS:
+            raise ValueError(f"Unknown shortest path method {method}")
+        
+        self._apsp_method = method
+        self._build_apsp()
+    
+    def _build_apsp(self) -> None:
+        """Rebuild every row of the all-pairs cache with the configured method."""
+        self._reset_cache()
+        for source in range(len(self._ids)):
+            self._row(source)
+    
+    def _reset_cache(self) -> None:
+        """Clear all cached rows and columns for the current graph, O(V)."""
+        if self._csr_dirty:
+            self._rebuild_csr()
+        
+        count = len(self._ids)
+        self._dist = [None] * count
+        self._pred = [None] * count
+        self._rows_cached = 0
+        self._delta_split = None
+        self._dist_to = {}
+        self._pair_cache = {}
+        self._dirty = False
+    
+    def _row(self, source: int) -> array:
+        """Get a source's row of the cache, running its search on first use."""
+        row = self._dist[source]
+        if row is None:
+            if self._apsp_method == "floyd-warshall":
+                self._fill_rows_floyd_warshall()
+                return self._dist[source]
+            if self._apsp_method == "delta-stepping":
+                if self._delta_split is None:
+                    delta = self._delta_stepping_width()
+                    self._delta_split = (delta,) + self._split_csr(delta)
+                delta, light, heavy = self._delta_split
+                distances, predecessors = _delta_stepping_csr(light, heavy, source, delta)
+            else:
+                distances, predecessors = _dijkstra_csr(
+                    self._indptr, self._indices, self._weights, source
+                )
+            row = array('d', distances)
+            self._dist[source] = row
+            self._pred[source] = array('i', predecessors)
+            self._rows_cached += 1
+        return row
+    
+    def _fill_rows_floyd_warshall(self) -> None:
+        """Fill every missing row of the cache from one Floyd-Warshall pass."""
+        distances, predecessors = _floyd_warshall_csr(
+            self._indptr, self._indices, self._weights
+        )
+        for source, row in enumerate(self._dist):
+            if row is None:
+                self._dist[source] = array('d', distances[source])
+                self._pred[source] = array('i', predecessors[source])
+                self._rows_cached += 1
+    
+    def _delta_stepping_width(self) -> float:
+        """
+        Bucket width for delta-stepping: max edge weight / max out-degree,
+        the Meyer & Sanders choice that keeps light-edge phases short.
+        """
+        max_degree = max(
+            (self._indptr[u + 1] - self._indptr[u] for u in range(len(self._ids))),
+            default=0
+        )
+        max_weight = max(self._weights, default=0.0)
+        
+        if max_degree == 0 or max_weight <= 0:
+            return 1.0
+        return max_weight / max_degree
+    
+    def _split_csr(self, delta: float) -> Tuple[Tuple[array, array, array], Tuple[array, array, array]]:
+        """Split the CSR arrays into light (weight <= delta) and heavy edges."""
+        light = (array('i', [0]), array('i'), array('d'))
+        heavy = (array('i', [0]), array('i'), array('d'))
+        
+        for u in range(len(self._ids)):
+            for k in range(self._indptr[u], self._indptr[u + 1]):
+                part = light if self._weights[k] <= delta else heavy
+                part[1].append(self._indices[k])
+                part[2].append(self._weights[k])
+            light[0].append(len(light[1]))
+            heavy[0].append(len(heavy[1]))
+        
+        return light, heavy
+    
+    def _point_to_point(self, start: str, end: str, limit: float) -> Tuple[float, List[int]]:
+        """
+        Answer a single query over the CSR arrays: A* when the city is metric
+        and coordinates give a usable heuristic, bidirectional Dijkstra otherwise.
+        
+        Exact answers are memoized per (start, end) until the graph changes;
+        a cached route longer than the limit is reported as unreachable.
+        """
+        key = (start, end)
+        cached = self._pair_cache.get(key)
+        if cached is not None:
+            return cached if cached[0] <= limit else (math.inf, [])
+        
+        result = self._search_point_to_point(start, end, limit)
+        # A miss under a finite limit only says the route is longer than it
+        if result[0] != math.inf or limit == math.inf:
+            if len(self._pair_cache) >= self.PAIR_CACHE_SIZE:
+                self._pair_cache.clear()
+            self._pair_cache[key] = result
+        return result
+    
+    def _search_point_to_point(self, start: str, end: str, limit: float) -> Tuple[float, List[int]]:
+        """Run the single-query search behind _point_to_point."""
+        if self._csr_dirty:
+            self._rebuild_csr()
+        source = self._index[start]
+        target = self._index[end]
         
+        # list.pop and list.append are atomic, so each search owns its set
+        try:
+            buffers = self._search_buffers.pop()
+        except IndexError:
+            n = len(self._ids)
+            buffers = ([math.inf] * n, [math.inf] * n, [-1] * n, [-1] * n)
+        
+        try:
+            if self._heuristic_scale > 0:
+                return _astar_csr(
+                    self._indptr, self._indices, self._weights,
+                    self._xs, self._ys, self._heuristic_scale,
+                    source, target, limit,
+                    buffers[0], buffers[2]
+                )
+            
+            return _bidirectional_dijkstra_csr(
+                (self._indptr, self._indices, self._weights),
+                (self._rindptr, self._rindices, self._rweights),
+                source,
+                target,
+                limit,
+                buffers
+            )
+        finally:
+            # Sets sized for an older graph are dropped
+            if len(buffers[0]) == len(self._ids):
+                self._search_buffers.append(buffers)
+    
+    def _reconstruct_path(self, predecessors: array, target: int) -> List[str]:
+        """Walk a predecessor tree back from target to its source."""
         path = []
-        current = end
-        while current is not None:
-            path.append(current)
+        current = target
+        while current != -1:
+            path.append(self._ids[current])
             current = predecessors[current]
         
         path.reverse()
-        return path, distances[end]
+        return path
     
+    def shortest_path(self, start: str, end: str, limit: float = math.inf) -> Tuple[List[str], float]:
+        """
+        Find the shortest path between two nodes using Dijkstra's algorithm.
+        Results are served from the start's row of the all-pairs cache when
+        it has been computed. Otherwise a single query runs a bidirectional
+        search instead; rows are filled by whole-table queries (sssp).
+        
+        Args:
+            start: Starting node ID
+            end: Ending node ID
+            limit: Maximum distance of interest; farther targets count as
+                unreachable
+        
+        Returns:
+            Tuple of (path as list of node IDs, total distance)
+            Returns ([], infinity) if no path exists within the limit
+        """
+        if start not in self._nodes:
+            raise ValueError(f"Start node {start} does not exist")
+        if end not in self._nodes:
+            raise ValueError(f"End node {end} does not exist")
+        
+        if self._dirty:
+            self._reset_cache()
+        
+        row = self._dist[self._index[start]]
+        if row is None:
+            distance, path = self._point_to_point(start, end, limit)
+            return [self._ids[i] for i in path], distance
+        
+        target = self._index[end]
+        distance = row[target]
+        if distance > limit or distance == math.inf:
+            return [], math.inf
+        
+        return self._reconstruct_path(self._pred[self._index[start]], target), distance
+
+    def shortest_paths_many(self, pairs: List[Tuple[str, str]]) -> List[Tuple[List[str], float]]:
+        """
+        Answer a batch of shortest path queries.
+
+        Pairs are grouped by start node. A start with several targets gets
+        one search that fills its row of the all-pairs cache, and all of its
+        paths are read from that row. A start with a single target uses the
+        memoized A* / bidirectional query of shortest_path.
+
+        Args:
+            pairs: List of (start, end) node ID pairs
+
+        Returns:
+            List of (path, distance) in the order of pairs, as shortest_path
+        """
+        for start, end in pairs:
+            if start not in self._nodes:
+                raise ValueError(f"Start node {start} does not exist")
+            if end not in self._nodes:
+                raise ValueError(f"End node {end} does not exist")
+
+        if self._dirty:
+            self._reset_cache()
+
+        targets_per_start: Dict[str, int] = {}
+        for start, _ in pairs:
+            targets_per_start[start] = targets_per_start.get(start, 0) + 1
+
+        index = self._index
+        results = []
+        for start, end in pairs:
+            source = index[start]
+            if self._dist[source] is None and targets_per_start[start] == 1:
+                results.append(self.shortest_path(start, end))
+                continue
+
+            distance = self._row(source)[index[end]]
+            if distance == math.inf:
+                results.append(([], math.inf))
+            else:
+                results.append((self._reconstruct_path(self._pred[source], index[end]), distance))
+
+        return results
+
     def calculate_distance(self, start: str, end: str) -> float:
         """
         Calculate the shortest distance between two nodes.
@@ -320,28 +1201,167 @@ class City:
         Returns:
             Distance value, or infinity if no path exists
         """
-        _, distance = self.shortest_path(start, end)
-        return distance
+        if start not in self._nodes:
+            raise ValueError(f"Start node {start} does not exist")
+        if end not in self._nodes:
+            raise ValueError(f"End node {end} does not exist")
+        
+        if self._dirty:
+            self._reset_cache()
+        
+        row = self._dist[self._index[start]]
+        if row is None:
+            return self._point_to_point(start, end, math.inf)[0]
+        
+        return row[self._index[end]]
+    
+    def sssp(self, source: str) -> Dict[str, float]:
+        """
+        Get shortest distances from a source to every node.
+        
+        Args:
+            source: Source node ID
+        
+        Returns:
+            Dictionary of node ID -> distance (infinity if unreachable)
+        """
+        if source not in self._nodes:
+            raise ValueError(f"Start node {source} does not exist")
+        
+        if self._dirty:
+            self._reset_cache()
+        
+        return dict(zip(self._ids, self._row(self._index[source])))
+    
+    def distances_to(self, target: str) -> Dict[str, float]:
+        """
+        Get shortest distances from every node to a target.
+        
+        Lets dispatch score all drivers against one pickup with a single
+        table instead of one query per driver. Reads the target's column of
+        the cache when every row is built, and otherwise runs one search on
+        the reversed roads, so one-way roads are respected. The map is
+        cached until the graph changes or DIST_TO_CACHE_SIZE other targets
+        are used more recently, and must not be mutated by callers.
+        
+        Args:
+            target: Target node ID
+        
+        Returns:
+            Dictionary of node ID -> distance (infinity if unreachable)
+        """
+        if target not in self._nodes:
+            raise ValueError(f"End node {target} does not exist")
+        
+        if self._dirty:
+            self._reset_cache()
+        
+        distances = self._dist_to.pop(target, None)
+        if distances is None:
+            if len(self._dist_to) >= self.DIST_TO_CACHE_SIZE:
+                del self._dist_to[next(iter(self._dist_to))]
+            column = self._index[target]
+            if self._rows_cached == len(self._ids):
+                distances = {
+                    node_id: self._dist[source][column]
+                    for source, node_id in enumerate(self._ids)
+                }
+            else:
+                reverse, _ = _dijkstra_csr(
+                    self._rindptr, self._rindices, self._rweights, column
+                )
+                distances = dict(zip(self._ids, reverse))
+        # Re-inserting moves the target to the most recently used end
+        self._dist_to[target] = distances
+        
+        return distances
     
     def to_dict(self) -> dict:
-        """Convert city to dictionary for serialization."""
+        """
+        Convert city to dictionary for serialization.
+        
+        The graph rarely changes between calls, so the node and edge dicts
+        are cached until the next mutation. Each call returns fresh copies
+        of them, which the caller may modify.
+        """
+        if self._serialized_version != self._version:
+            self._serialized = {
+                "nodes": [node.to_dict() for node in self._nodes.values()],
+                "edges": [edge.to_dict() for edge in self._edges]
+            }
+            self._serialized_version = self._version
+        serialized = self._serialized
         return {
             "name": self.name,
-            "nodes": [node.to_dict() for node in self._nodes.values()],
-            "edges": [edge.to_dict() for edge in self._edges],
-            "zones": self._zones
+            "nodes": [dict(node) for node in serialized["nodes"]],
+            "edges": [dict(edge) for edge in serialized["edges"]],
+            "zones": {zone: list(node_ids) for zone, node_ids in self._zones.items()}
         }
     
+    def copy(self) -> 'City':
+        """
+        Create an independent copy of the road graph.
+        
+        Much cheaper than replaying add_node/add_edge: the tables are copied
+        directly and Node objects, which are never modified, are shared.
+        Edges are cloned because re-adding a road updates its distance in
+        place. When this city's caches are current, the CSR arrays and the
+        rows of the all-pairs cache are shared too, since they are only
+        ever replaced, never written in place.
+        
+        Returns:
+            A new City with the same nodes, zones and roads
+        """
+        city = type(self)(self.name, self._optimize_locality, self._metric)
+        city._nodes = dict(self._nodes)
+        city._zone_of = dict(self._zone_of)
+        city._adjacency = {node_id: list(arcs) for node_id, arcs in self._adjacency.items()}
+        city._zones = {zone: list(node_ids) for zone, node_ids in self._zones.items()}
+        
+        clones = {id(edge): Edge(edge.from_node, edge.to_node, edge.distance) for edge in self._edges}
+        city._edges = list(clones.values())
+        city._edge_map = {key: clones[id(edge)] for key, edge in self._edge_map.items()}
+        city._version = self._version
+        city._apsp_method = self._apsp_method
+        
+        if not self._dirty:
+            city._ids = self._ids
+            city._index = self._index
+            city._indptr, city._indices, city._weights = self._indptr, self._indices, self._weights
+            city._rindptr, city._rindices, city._rweights = self._rindptr, self._rindices, self._rweights
+            city._xs, city._ys = self._xs, self._ys
+            city._heuristic_scale = self._heuristic_scale
+            city._dist = list(self._dist)
+            city._pred = list(self._pred)
+            city._rows_cached = self._rows_cached
+            city._dirty = city._csr_dirty = False
+        return city
+    
     @classmethod
     def create_sample_city(cls) -> 'City':
         """
         Create a sample city with multiple zones for testing.
         
+        The graph and its all-pairs table (one Floyd-Warshall pass, the
+        fastest build for a graph this small) are made once per class. Each
+        call returns a copy, so queries start as table lookups and callers
+        may still modify the city they get.
+        
         Layout:
         Zone A (North): A1, A2, A3
         Zone B (South): B1, B2, B3
         Zone C (East): C1, C2
         """
+        template = _SAMPLE_CITIES.get(cls)
+        if template is None:
+            template = cls._build_sample_city()
+            template.build_apsp("floyd-warshall")
+            _SAMPLE_CITIES[cls] = template
+        return template.copy()
+    
+    @classmethod
+    def _build_sample_city(cls) -> 'City':
+        """Build the sample city graph node by node and road by road."""
         city = cls("Sample City")
         
         # Zone A - North area
@@ -382,3 +1402,7 @@ class City:
         city.add_edge("B3", "C2", 5.0)
         
         return city
+
+
+# Built sample city per City class, copied by create_sample_city
+_SAMPLE_CITIES: Dict[type, City] = {}
@@ -7,7 +7,8 @@ This module implements:
 - Optimal driver selection based on distance
 """
 
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, KeysView, List, Optional, Tuple
+from functools import lru_cache
 import math
 
 from City import City
@@ -28,6 +29,9 @@ class DispatchEngine:
     # Penalty multiplier for cross-zone assignments
     CROSS_ZONE_PENALTY = 1.5
     
+    # Number of (pickup, dropoff) route estimates kept per engine
+    ROUTE_CACHE_SIZE = 4096
+    
     def __init__(self, city: City):
         """
         Initialize the dispatch engine.
@@ -37,6 +41,30 @@ class DispatchEngine:
         """
         self._city = city
         self._drivers: Dict[str, Driver] = {}
+        # Registration sequence number per driver; equally close drivers
+        # are ranked by it, earliest registered first
+        self._rank: Dict[str, int] = {}
+        self._registrations = 0
+        
+        # Memoized route part of trip estimates, valid for one city version
+        self._route_estimate = lru_cache(maxsize=self.ROUTE_CACHE_SIZE)(
+            self._compute_route_estimate
+        )
+        self._route_cache_version = city.get_version()
+        
+        # Secondary indexes kept current through Driver observer callbacks.
+        # Dicts are used as insertion-ordered sets (driver_id -> Driver) so
+        # candidate order, and therefore tie-breaking, is deterministic.
+        self._by_zone: Dict[str, Dict[str, Driver]] = {}
+        self._available: Dict[str, Driver] = {}
+        self._available_by_zone: Dict[str, Dict[str, Driver]] = {}
+        # Available drivers grouped zone -> location -> drivers, so scoring
+        # does one distance lookup per occupied node rather than per driver
+        self._available_locations: Dict[str, Dict[str, Dict[str, Driver]]] = {}
+        self._status_counts: Dict[str, Dict[DriverStatus, int]] = {}
+        # Zone statistics table, dropped whenever a driver is (un)indexed
+        self._zone_stats: Optional[Dict] = None
+        self._zone_stats_version = -1
     
     def register_driver(self, driver: Driver) -> None:
         """
@@ -45,7 +73,14 @@ class DispatchEngine:
         Args:
             driver: Driver to register
         """
+        if driver.driver_id in self._drivers:
+            self.unregister_driver(driver.driver_id)
+        
         self._drivers[driver.driver_id] = driver
+        self._registrations += 1
+        self._rank[driver.driver_id] = self._registrations
+        self._index_driver(driver)
+        driver.add_observer(self._on_driver_changed)
     
     def unregister_driver(self, driver_id: str) -> None:
         """
@@ -55,42 +90,114 @@ class DispatchEngine:
             driver_id: ID of driver to unregister
         """
         if driver_id in self._drivers:
-            del self._drivers[driver_id]
+            driver = self._drivers.pop(driver_id)
+            del self._rank[driver_id]
+            driver.remove_observer(self._on_driver_changed)
+            self._unindex_driver(driver, driver.zone, driver.status, driver.current_location)
+    
+    def _index_driver(self, driver: Driver) -> None:
+        """Add a driver to the zone and availability indexes."""
+        driver_id = driver.driver_id
+        zone = driver.zone
+        self._zone_stats = None
+        
+        self._by_zone.setdefault(zone, {})[driver_id] = driver
+        
+        counts = self._status_counts.get(zone)
+        if counts is None:
+            counts = self._status_counts[zone] = dict.fromkeys(DriverStatus, 0)
+        counts[driver.status] += 1
+        
+        if driver.status == DriverStatus.AVAILABLE:
+            self._available[driver_id] = driver
+            self._available_by_zone.setdefault(zone, {})[driver_id] = driver
+            locations = self._available_locations.setdefault(zone, {})
+            locations.setdefault(driver.current_location, {})[driver_id] = driver
+    
+    def _unindex_driver(
+        self,
+        driver: Driver,
+        zone: str,
+        status: DriverStatus,
+        location: str
+    ) -> None:
+        """Remove a driver from the indexes using its previous zone/status/location."""
+        driver_id = driver.driver_id
+        self._zone_stats = None
+        
+        del self._by_zone[zone][driver_id]
+        self._status_counts[zone][status] -= 1
+        
+        if status == DriverStatus.AVAILABLE:
+            del self._available[driver_id]
+            del self._available_by_zone[zone][driver_id]
+            
+            # Drop emptied locations so scoring never visits them
+            locations = self._available_locations[zone]
+            drivers_here = locations[location]
+            del drivers_here[driver_id]
+            if not drivers_here:
+                del locations[location]
+    
+    def _on_driver_changed(
+        self,
+        driver: Driver,
+        old_zone: str,
+        old_status: DriverStatus,
+        old_location: str
+    ) -> None:
+        """Observer callback: move a driver between index buckets."""
+        self._unindex_driver(driver, old_zone, old_status, old_location)
+        self._index_driver(driver)
     
     def get_driver(self, driver_id: str) -> Optional[Driver]:
         """Get a driver by ID."""
         return self._drivers.get(driver_id)
     
+    def get_driver_ids(self) -> KeysView[str]:
+        """Get the IDs of all registered drivers as a live set-like view."""
+        return self._drivers.keys()
+    
     def get_all_drivers(self) -> List[Driver]:
         """Get all registered drivers."""
         return list(self._drivers.values())
     
     def get_available_drivers(self) -> List[Driver]:
         """Get all available drivers."""
-        return [d for d in self._drivers.values() if d.is_available()]
+        return list(self._available.values())
     
     def get_drivers_in_zone(self, zone: str) -> List[Driver]:
         """Get all drivers currently in a specific zone."""
-        return [d for d in self._drivers.values() if d.zone == zone]
+        return list(self._by_zone.get(zone, {}).values())
     
     def get_available_drivers_in_zone(self, zone: str) -> List[Driver]:
         """Get all available drivers in a specific zone."""
-        return [d for d in self._drivers.values() 
-                if d.zone == zone and d.is_available()]
+        return list(self._available_by_zone.get(zone, {}).values())
     
-    def find_best_driver(self, pickup_location: str) -> Optional[Tuple[Driver, float, bool]]:
+    def find_best_driver(
+        self,
+        pickup_location: str,
+        max_distance: float = math.inf
+    ) -> Optional[Tuple[Driver, float, bool]]:
         """
         Find the best available driver for a pickup location.
         
         Algorithm:
         1. Get the zone of the pickup location
-        2. Search for available drivers in the same zone first
-        3. If no same-zone drivers, search all zones
-        4. Select the closest driver by distance
-        5. Apply cross-zone penalty if applicable
+        2. A driver waiting at the pickup itself wins at distance 0, with
+           no distance lookup at all
+        3. Otherwise scan the available drivers of the pickup zone; the
+           closest one wins outright, since same-zone drivers carry no penalty
+        4. Only if there is none, scan the other zones for the closest
+           cross-zone driver (penalized)
+        
+        Equally close drivers are ranked by registration order. The one
+        exception is step 2: with zero-length roads, a driver at the pickup
+        wins over earlier-registered drivers that are also 0 away.
         
         Args:
             pickup_location: Node ID for the pickup location
+            max_distance: Ignore drivers farther than this from the pickup
         
         Returns:
             Tuple of (driver, distance_to_pickup, is_cross_zone) or None if no driver available
@@ -99,50 +206,95 @@ class DispatchEngine:
         if pickup_zone is None:
             return None
         
-        # First, try to find drivers in the same zone
-        same_zone_drivers = self.get_available_drivers_in_zone(pickup_zone)
+        same_zone = self._available_locations.get(pickup_zone)
+        if same_zone and max_distance >= 0:
+            drivers_here = same_zone.get(pickup_location)
+            if drivers_here:
+                return (self._first_registered(drivers_here), 0.0, False)
         
-        best_driver: Optional[Driver] = None
-        best_distance = math.inf
-        is_cross_zone = False
+        # One lookup table of distances into the pickup serves every driver
+        distances_to_pickup = self._city.distances_to(pickup_location)
         
-        # Check same-zone drivers first (no penalty)
-        for driver in same_zone_drivers:
-            distance = self._city.calculate_distance(
-                driver.current_location, pickup_location
+        # Same-zone drivers always win (no penalty), so other zones are
+        # only scanned when the pickup zone has no driver in range
+        if same_zone:
+            best_same, best_same_distance = self._closest_driver(
+                same_zone, distances_to_pickup
             )
-            if distance < best_distance:
-                best_distance = distance
-                best_driver = driver
-        
-        # If found a same-zone driver, return it
-        if best_driver is not None:
-            return (best_driver, best_distance, False)
+            if best_same is not None and best_same_distance <= max_distance:
+                return (best_same, best_same_distance, False)
         
-        # Otherwise, check all available drivers (cross-zone)
-        all_available = self.get_available_drivers()
+        best_cross: Optional[Driver] = None
+        best_cross_distance = math.inf
+        best_cross_raw = math.inf
         
-        for driver in all_available:
-            distance = self._city.calculate_distance(
-                driver.current_location, pickup_location
+        for zone, locations in self._available_locations.items():
+            if zone == pickup_zone:
+                continue
+            
+            zone_best, zone_best_distance = self._closest_driver(
+                locations, distances_to_pickup
             )
-            # Apply cross-zone penalty for comparison
-            effective_distance = distance * self.CROSS_ZONE_PENALTY
+            if zone_best is None or zone_best_distance > max_distance:
+                continue
             
-            if effective_distance < best_distance:
-                best_distance = effective_distance
-                best_driver = driver
-                is_cross_zone = True
-        
-        if best_driver is not None:
+            # Apply cross-zone penalty for comparison
+            effective_distance = zone_best_distance * self.CROSS_ZONE_PENALTY
+            if effective_distance < best_cross_distance or (
+                effective_distance == best_cross_distance
+                and self._rank[zone_best.driver_id] < self._rank[best_cross.driver_id]
+            ):
+                best_cross_distance = effective_distance
+                best_cross_raw = zone_best_distance
+                best_cross = zone_best
+        
+        if best_cross is not None:
             # Return actual distance, not penalized distance
-            actual_distance = self._city.calculate_distance(
-                best_driver.current_location, pickup_location
-            )
-            return (best_driver, actual_distance, True)
+            return (best_cross, best_cross_raw, True)
         
         return None
     
+    def _first_registered(self, drivers: Dict[str, Driver]) -> Driver:
+        """Pick the earliest-registered driver of a location bucket."""
+        if len(drivers) == 1:
+            return next(iter(drivers.values()))
+        rank = self._rank
+        return min(drivers.values(), key=lambda driver: rank[driver.driver_id])
+    
+    def _closest_driver(
+        self,
+        locations: Dict[str, Dict[str, Driver]],
+        distances_to_pickup: Dict[str, float]
+    ) -> Tuple[Optional[Driver], float]:
+        """
+        Find the closest driver among one zone's occupied locations.
+        
+        Each occupied node is scored once however many drivers wait there.
+        Ties, within a node or between equally distant nodes, go to the
+        earliest-registered driver.
+        
+        Args:
+            locations: location -> {driver_id: Driver} for one zone
+            distances_to_pickup: Distance from each node to the pickup
+        
+        Returns:
+            Tuple of (driver, distance), or (None, inf) if none is reachable
+        """
+        best: Optional[Driver] = None
+        best_distance = math.inf
+        best_rank = 0
+        for location, drivers_here in locations.items():
+            distance = distances_to_pickup[location]
+            if distance > best_distance or distance == math.inf:
+                continue
+            driver = self._first_registered(drivers_here)
+            rank = self._rank[driver.driver_id]
+            if distance < best_distance or rank < best_rank:
+                best_distance = distance
+                best = driver
+                best_rank = rank
+        return best, best_distance
+    
     def assign_driver_to_trip(self, trip: Trip) -> Optional[Driver]:
         """
         Find and assign the best driver to a trip.
@@ -160,19 +312,32 @@ class DispatchEngine:
         
         driver, pickup_distance, is_cross_zone = result
         
+        return driver if self.assign_driver(trip, driver) else None
+    
+    def assign_driver(self, trip: Trip, driver: Driver) -> bool:
+        """
+        Assign a specific, already chosen driver to a trip.
+        
+        Args:
+            trip: Trip to assign the driver to
+            driver: Available driver to assign
+        
+        Returns:
+            True if assigned, False if there is no route to the drop-off
+        """
         # Calculate route distance and path
         path, trip_distance = self._city.shortest_path(
             trip.pickup_location, trip.dropoff_location
         )
         
         if trip_distance == math.inf:
-            return None  # No valid route
+            return False  # No valid route
         
         # Assign the driver to the trip
         driver.assign_trip(trip.trip_id)
         trip.assign_driver(driver.driver_id, trip_distance, path)
         
-        return driver
+        return True
     
     def calculate_trip_estimate(
         self, 
@@ -189,6 +354,51 @@ class DispatchEngine:
         Returns:
             Dictionary with estimates or None if invalid locations
         """
+        # Routes only change when the graph does
+        version = self._city.get_version()
+        if version != self._route_cache_version:
+            self._route_estimate.cache_clear()
+            self._route_cache_version = version
+        
+        route = self._route_estimate(pickup_location, dropoff_location)
+        if route is None:
+            return None
+        
+        path, route_fields = route
+        
+        # Find best available driver
+        driver_result = self.find_best_driver(pickup_location)
+        driver_eta = None
+        
+        if driver_result:
+            driver, pickup_distance, _ = driver_result
+            driver_eta = (pickup_distance / 30) * 60  # minutes
+        
+        # Only the driver part changes between calls for the same route
+        return {
+            **route_fields,
+            "path": list(path),
+            "driver_available": driver_result is not None,
+            "driver_eta": round(driver_eta, 1) if driver_eta else None
+        }
+    
+    def _compute_route_estimate(
+        self,
+        pickup_location: str,
+        dropoff_location: str
+    ) -> Optional[Tuple[Tuple[str, ...], Dict]]:
+        """
+        Compute the graph-dependent part of a trip estimate.
+        
+        Args:
+            pickup_location: Node ID for pickup
+            dropoff_location: Node ID for drop-off
+        
+        Returns:
+            Tuple of (path, estimate fields), where the fields are the
+            rounded distance, duration in minutes, cost and cross-zone flag,
+            or None if a location is invalid or unreachable
+        """
         pickup_zone = self._city.get_zone(pickup_location)
         dropoff_zone = self._city.get_zone(dropoff_location)
         
@@ -213,22 +423,11 @@ class DispatchEngine:
         # Estimate duration (30 km/h average)
         estimated_duration = (distance / 30) * 60  # minutes
         
-        # Find best available driver
-        driver_result = self.find_best_driver(pickup_location)
-        driver_eta = None
-        
-        if driver_result:
-            driver, pickup_distance, _ = driver_result
-            driver_eta = (pickup_distance / 30) * 60  # minutes
-        
-        return {
+        return tuple(path), {
             "distance": round(distance, 2),
             "estimated_duration": round(estimated_duration, 1),
             "cost": round(cost, 2),
-            "is_cross_zone": is_cross_zone,
-            "path": path,
-            "driver_available": driver_result is not None,
-            "driver_eta": round(driver_eta, 1) if driver_eta else None
+            "is_cross_zone": is_cross_zone
         }
     
     def update_driver_location(
@@ -261,23 +460,34 @@ class DispatchEngine:
         """
         Get statistics about driver distribution across zones.
         
+        Counts come from the status index. The table is cached until a
+        driver changes or the city gains zones; each call returns a copy
+        the caller may modify.
+        
         Returns:
             Dictionary with zone-level statistics
         """
+        version = self._city.get_version()
+        if self._zone_stats is None or self._zone_stats_version != version:
+            self._build_zone_statistics(version)
+        return {zone: dict(counts) for zone, counts in self._zone_stats.items()}
+    
+    def _build_zone_statistics(self, version: int) -> None:
+        """Rebuild the cached zone statistics table from the status index."""
         zones = self._city.get_all_zones()
         stats = {}
         
         for zone in zones:
-            zone_drivers = self.get_drivers_in_zone(zone)
-            available = [d for d in zone_drivers if d.is_available()]
-            busy = [d for d in zone_drivers if d.status == DriverStatus.BUSY]
-            offline = [d for d in zone_drivers if d.status == DriverStatus.OFFLINE]
+            counts = self._status_counts.get(zone)
+            if counts is None:
+                counts = dict.fromkeys(DriverStatus, 0)
             
             stats[zone] = {
-                "total_drivers": len(zone_drivers),
-                "available": len(available),
-                "busy": len(busy),
-                "offline": len(offline)
+                "total_drivers": len(self._by_zone.get(zone, ())),
+                "available": counts[DriverStatus.AVAILABLE],
+                "busy": counts[DriverStatus.BUSY],
+                "offline": counts[DriverStatus.OFFLINE]
             }
         
-        return stats
+        self._zone_stats = stats
+        self._zone_stats_version = version
@@ -7,9 +7,9 @@ This module defines the Driver class with:
 - Utilization metrics
 """
 
-from typing import Optional
+from typing import Optional, List, Callable, NamedTuple
 from enum import Enum
-import copy
+import sys
 
 
 class DriverStatus(Enum):
@@ -18,6 +18,13 @@ class DriverStatus(Enum):
     BUSY = "busy"
     OFFLINE = "offline"
 
+    def __init__(self, value: str):
+        # Same string as .value, read without the Enum descriptor
+        self.text = value
+    
+    # Identity hash in C; see TripState.__hash__
+    __hash__ = object.__hash__
+
 
 class Driver:
     """
@@ -34,6 +41,12 @@ class Driver:
         active_time: Total time driver has been active (for utilization)
     """
     
+    __slots__ = (
+        "driver_id", "name", "current_location", "zone", "status",
+        "total_trips", "total_distance", "active_time", "idle_time",
+        "current_trip_id", "_observers", "_stats_observers"
+    )
+    
     def __init__(
         self,
         driver_id: str,
@@ -43,7 +56,9 @@ class Driver:
     ):
         self.driver_id = driver_id
         self.name = name
-        self.current_location = current_location
+        # Interned like the city's node IDs, so location-keyed lookups
+        # match by identity
+        self.current_location = sys.intern(current_location)
         self.zone = zone
         self.status = DriverStatus.AVAILABLE
         
@@ -55,6 +70,57 @@ class Driver:
         
         # Current assignment
         self.current_trip_id: Optional[str] = None
+        
+        # Callbacks run as callback(driver, old_zone, old_status, old_location)
+        # whenever the zone, status or location changes, so indexes built on
+        # them stay current
+        self._observers: List[Callable[['Driver', str, DriverStatus, str], None]] = []
+        # Callbacks run as callback(driver) whenever total_trips, active_time
+        # or idle_time may have changed, for utilization aggregates
+        self._stats_observers: List[Callable[['Driver'], None]] = []
+    
+    def add_observer(self, callback: Callable[['Driver', str, DriverStatus, str], None]) -> None:
+        """Subscribe to zone/status/location changes of this driver."""
+        self._observers.append(callback)
+    
+    def remove_observer(self, callback: Callable[['Driver', str, DriverStatus, str], None]) -> None:
+        """Unsubscribe a previously added callback."""
+        if callback in self._observers:
+            self._observers.remove(callback)
+    
+    def add_stats_observer(self, callback: Callable[['Driver'], None]) -> None:
+        """Subscribe to trip count and active/idle time changes of this driver."""
+        self._stats_observers.append(callback)
+    
+    def remove_stats_observer(self, callback: Callable[['Driver'], None]) -> None:
+        """Unsubscribe a previously added stats callback."""
+        if callback in self._stats_observers:
+            self._stats_observers.remove(callback)
+    
+    def _notify_stats(self) -> None:
+        """Run stats observer callbacks."""
+        for callback in self._stats_observers:
+            callback(self)
+    
+    def _set_state(
+        self,
+        status: DriverStatus,
+        zone: str,
+        location: Optional[str] = None
+    ) -> None:
+        """Update status, zone and location, notifying observers on any change."""
+        old_zone = self.zone
+        old_status = self.status
+        old_location = self.current_location
+        self.status = status
+        self.zone = zone
+        if location is not None:
+            self.current_location = location
+        
+        if (old_zone != zone or old_status != status
+                or old_location != self.current_location):
+            for callback in self._observers:
+                callback(self, old_zone, old_status, old_location)
     
     def is_available(self) -> bool:
         """Check if driver is available for new assignments."""
@@ -70,8 +136,8 @@ class Driver:
         if not self.is_available():
             raise ValueError(f"Driver {self.driver_id} is not available")
         
-        self.status = DriverStatus.BUSY
         self.current_trip_id = trip_id
+        self._set_state(DriverStatus.BUSY, self.zone)
     
     def complete_trip(self, distance: float, duration: float) -> None:
         """
@@ -81,16 +147,17 @@ class Driver:
             distance: Distance traveled in this trip
             duration: Time spent on this trip (minutes)
         """
-        self.status = DriverStatus.AVAILABLE
         self.current_trip_id = None
         self.total_trips += 1
         self.total_distance += distance
         self.active_time += duration
+        self._notify_stats()
+        self._set_state(DriverStatus.AVAILABLE, self.zone)
     
     def cancel_current_trip(self) -> None:
         """Cancel the current assigned trip and become available."""
-        self.status = DriverStatus.AVAILABLE
         self.current_trip_id = None
+        self._set_state(DriverStatus.AVAILABLE, self.zone)
     
     def update_location(self, new_location: str, new_zone: str) -> None:
         """
@@ -100,18 +167,17 @@ class Driver:
             new_location: New node ID
             new_zone: New zone name
         """
-        self.current_location = new_location
-        self.zone = new_zone
+        self._set_state(self.status, sys.intern(new_zone), sys.intern(new_location))
     
     def go_offline(self) -> None:
         """Set driver status to offline."""
         if self.current_trip_id is not None:
             raise ValueError("Cannot go offline while on a trip")
-        self.status = DriverStatus.OFFLINE
+        self._set_state(DriverStatus.OFFLINE, self.zone)
     
     def go_online(self) -> None:
         """Set driver status to available."""
-        self.status = DriverStatus.AVAILABLE
+        self._set_state(DriverStatus.AVAILABLE, self.zone)
     
     def get_utilization_rate(self) -> float:
         """
@@ -128,6 +194,7 @@ class Driver:
     def add_idle_time(self, minutes: float) -> None:
         """Add idle time to the driver's record."""
         self.idle_time += minutes
+        self._notify_stats()
     
     def create_snapshot(self) -> 'DriverSnapshot':
         """
@@ -136,18 +203,20 @@ class Driver:
         Returns:
             DriverSnapshot object containing current state
         """
-        return DriverSnapshot(
-            driver_id=self.driver_id,
-            name=self.name,
-            current_location=self.current_location,
-            zone=self.zone,
-            status=self.status,
-            total_trips=self.total_trips,
-            total_distance=self.total_distance,
-            active_time=self.active_time,
-            idle_time=self.idle_time,
-            current_trip_id=self.current_trip_id
-        )
+        # tuple.__new__ fills the tuple in C, skipping the Python-level
+        # __new__ that NamedTuple generates; field order must match
+        return tuple.__new__(DriverSnapshot, (
+            self.driver_id,
+            self.name,
+            self.current_location,
+            self.zone,
+            self.status,
+            self.total_trips,
+            self.total_distance,
+            self.active_time,
+            self.idle_time,
+            self.current_trip_id
+        ))
     
     def restore_from_snapshot(self, snapshot: 'DriverSnapshot') -> None:
         """
@@ -156,15 +225,11 @@ class Driver:
         Args:
             snapshot: DriverSnapshot to restore from
         """
-        self.name = snapshot.name
-        self.current_location = snapshot.current_location
-        self.zone = snapshot.zone
-        self.status = snapshot.status
-        self.total_trips = snapshot.total_trips
-        self.total_distance = snapshot.total_distance
-        self.active_time = snapshot.active_time
-        self.idle_time = snapshot.idle_time
-        self.current_trip_id = snapshot.current_trip_id
+        (_, self.name, location, zone, status,
+         self.total_trips, self.total_distance, self.active_time,
+         self.idle_time, self.current_trip_id) = snapshot
+        self._notify_stats()
+        self._set_state(status, zone, location)
     
     def to_dict(self) -> dict:
         """Convert driver to dictionary for serialization."""
@@ -173,7 +238,7 @@ class Driver:
             "name": self.name,
             "current_location": self.current_location,
             "zone": self.zone,
-            "status": self.status.value,
+            "status": self.status.text,
             "total_trips": self.total_trips,
             "total_distance": self.total_distance,
             "active_time": self.active_time,
@@ -183,31 +248,17 @@ class Driver:
         }
 
 
-class DriverSnapshot:
+class DriverSnapshot(NamedTuple):
     """
     Immutable snapshot of driver state for rollback purposes.
     """
-    
-    def __init__(
-        self,
-        driver_id: str,
-        name: str,
-        current_location: str,
-        zone: str,
-        status: DriverStatus,
-        total_trips: int,
-        total_distance: float,
-        active_time: float,
-        idle_time: float,
-        current_trip_id: Optional[str]
-    ):
-        self.driver_id = driver_id
-        self.name = name
-        self.current_location = current_location
-        self.zone = zone
-        self.status = status
-        self.total_trips = total_trips
-        self.total_distance = total_distance
-        self.active_time = active_time
-        self.idle_time = idle_time
-        self.current_trip_id = current_trip_id
+    driver_id: str
+    name: str
+    current_location: str
+    zone: str
+    status: DriverStatus
+    total_trips: int
+    total_distance: float
+    active_time: float
+    idle_time: float
+    current_trip_id: Optional[str]
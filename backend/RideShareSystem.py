@@ -8,9 +8,11 @@ This module provides:
 - Rollback coordination
 """
 
-from typing import Dict, List, Optional, Tuple
+from typing import Callable, Dict, List, Optional, Tuple, TypeVar
 from datetime import datetime
+import functools
 import math
+import threading
 
 from City import City
 from Driver import Driver, DriverStatus
@@ -20,6 +22,51 @@ from DispatchEngine import DispatchEngine
 from RollbackManager import RollbackManager, OperationType
 
 
+# Entity IDs below this number come from a preformatted table per prefix
+ID_CACHE_SIZE = 10000
+
+_id_cache: Dict[str, Tuple[str, ...]] = {}
+
+
+def _format_id(prefix: str, number: int) -> str:
+    """
+    Format an entity ID such as "D-0001".
+    
+    The table for a prefix is built on first use and shared by every
+    system in the process, so the common case is a tuple lookup.
+    
+    Args:
+        prefix: ID prefix ("D", "R" or "T")
+        number: Sequence number of the entity
+    
+    Returns:
+        Formatted ID string
+    """
+    if number < ID_CACHE_SIZE:
+        table = _id_cache.get(prefix)
+        if table is None:
+            table = tuple(f"{prefix}-{i:04d}" for i in range(ID_CACHE_SIZE))
+            _id_cache[prefix] = table
+        return table[number]
+    return f"{prefix}-{number:04d}"
+
+
+_Method = TypeVar("_Method", bound=Callable)
+
+
+def _synchronized(method: _Method) -> _Method:
+    """
+    Run a RideShareSystem method while holding the system's state lock.
+    
+    The lock is re-entrant, so synchronized methods may call each other.
+    """
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._state_lock:
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
 class RideShareSystem:
     """
     Main facade for the ride-sharing system.
@@ -31,16 +78,22 @@ class RideShareSystem:
     - Rollback operations
     """
     
-    def __init__(self, city: Optional[City] = None):
+    def __init__(self, city: Optional[City] = None, max_operations: int = 100):
         """
         Initialize the ride-sharing system.
         
         Args:
             city: City graph (creates sample city if None)
+            max_operations: Number of most recent operations kept for
+                rollback; older ones are dropped to bound memory
         """
         # Initialize city
         self._city = city if city else City.create_sample_city()
         
+        # Guards entity tables, counters and aggregates so mutators and
+        # readers from different threads see a consistent state
+        self._state_lock = threading.RLock()
+        
         # Entity storage
         self._drivers: Dict[str, Driver] = {}
         self._riders: Dict[str, Rider] = {}
@@ -51,17 +104,137 @@ class RideShareSystem:
         self._rider_counter = 0
         self._trip_counter = 0
         
+        # Running trip aggregates for analytics, kept current through Trip
+        # observer callbacks. Each trip's last counted contribution
+        # (state, distance, cost, cross-zone, driver) is stored so it can be
+        # subtracted again when the trip changes or is removed by a rollback.
+        self._trip_state_counts: Dict[TripState, int] = dict.fromkeys(TripState, 0)
+        self._completed_distance = 0.0
+        self._completed_revenue = 0.0
+        self._cross_zone_completed = 0
+        self._trip_contributions: Dict[str, Tuple[TripState, float, float, bool, Optional[str]]] = {}
+        # Per-driver trip indexes: driver_id -> {trip_id: cost} of completed
+        # trips, and driver_id -> IDs of cancelled trips
+        self._driver_completed: Dict[str, Dict[str, float]] = {}
+        self._driver_cancelled: Dict[str, set] = {}
+        # Non-terminal trips, trip_id -> Trip
+        self._active_trips: Dict[str, Trip] = {}
+        # Utilization rate of each driver with any activity, kept current
+        # through Driver stats observer callbacks
+        self._driver_utilization: Dict[str, float] = {}
+        # Last get_analytics result, dropped whenever an aggregate changes
+        self._analytics: Optional[Dict] = None
+        
         # Initialize dispatch engine
         self._dispatch_engine = DispatchEngine(self._city)
         
         # Initialize rollback manager
-        self._rollback_manager = RollbackManager()
+        self._rollback_manager = RollbackManager(max_operations)
         self._rollback_manager.set_system_references(
             self._drivers, self._riders, self._trips
         )
+        self._rollback_manager.add_entity_observer(self._on_rollback_entity_removed)
+    
+    def _on_rollback_entity_removed(
+        self,
+        entity_type: str,
+        entity_id: str,
+        entity: object
+    ) -> None:
+        """Rollback callback: stop following drivers and trips it deletes."""
+        if entity_type == "driver":
+            self._dispatch_engine.unregister_driver(entity_id)
+            entity.remove_stats_observer(self._on_driver_stats_changed)
+            self._driver_utilization.pop(entity_id, None)
+        elif entity_type == "trip":
+            entity.remove_observer(self._on_trip_changed)
+            self._remove_trip_contribution(entity_id)
+    
+    # ==================== Driver Aggregates ====================
+    
+    def _track_driver(self, driver: Driver) -> None:
+        """Start counting a driver in the utilization aggregate."""
+        driver.add_stats_observer(self._on_driver_stats_changed)
+        self._on_driver_stats_changed(driver)
+    
+    def _on_driver_stats_changed(self, driver: Driver) -> None:
+        """Driver stats callback: refresh the driver's utilization rate."""
+        self._analytics = None
+        active_time = driver.active_time
+        if driver.total_trips > 0 or active_time > 0:
+            total_time = active_time + driver.idle_time
+            self._driver_utilization[driver.driver_id] = (
+                active_time / total_time if total_time else 0.0
+            )
+        else:
+            self._driver_utilization.pop(driver.driver_id, None)
+    
+    # ==================== Trip Aggregates ====================
+    
+    def _track_trip(self, trip: Trip) -> None:
+        """Start counting a trip in the analytics aggregates."""
+        trip.add_observer(self._on_trip_changed)
+        self._add_trip_contribution(trip)
+    
+    def _add_trip_contribution(self, trip: Trip) -> None:
+        """Add a trip's current state to the aggregates."""
+        self._analytics = None
+        completed = trip.state == TripState.COMPLETED
+        contribution = (
+            trip.state,
+            trip.distance if completed else 0.0,
+            trip.cost if completed else 0.0,
+            completed and trip.is_cross_zone,
+            trip.driver_id
+        )
+        self._trip_contributions[trip.trip_id] = contribution
+        
+        if not trip.is_terminal():
+            self._active_trips[trip.trip_id] = trip
+        
+        self._trip_state_counts[trip.state] += 1
+        self._completed_distance += contribution[1]
+        self._completed_revenue += contribution[2]
+        self._cross_zone_completed += contribution[3]
+        
+        driver_id = trip.driver_id
+        if driver_id is not None:
+            if trip.state == TripState.CANCELLED:
+                self._driver_cancelled.setdefault(driver_id, set()).add(trip.trip_id)
+            elif completed:
+                self._driver_completed.setdefault(driver_id, {})[trip.trip_id] = trip.cost
+    
+    def _remove_trip_contribution(self, trip_id: str) -> None:
+        """Subtract a trip's last counted contribution from the aggregates."""
+        self._analytics = None
+        state, distance, cost, cross_zone, driver_id = self._trip_contributions.pop(trip_id)
+        
+        self._active_trips.pop(trip_id, None)
+        
+        self._trip_state_counts[state] -= 1
+        self._completed_distance -= distance
+        self._completed_revenue -= cost
+        self._cross_zone_completed -= cross_zone
+        
+        # Do not let float drift survive once nothing is left to sum
+        if self._trip_state_counts[TripState.COMPLETED] == 0:
+            self._completed_distance = 0.0
+            self._completed_revenue = 0.0
+        
+        if driver_id is not None:
+            if state == TripState.CANCELLED:
+                self._driver_cancelled[driver_id].discard(trip_id)
+            elif state == TripState.COMPLETED:
+                del self._driver_completed[driver_id][trip_id]
+    
+    def _on_trip_changed(self, trip: Trip, old_state: TripState) -> None:
+        """Observer callback: recount a trip after a transition or restore."""
+        self._remove_trip_contribution(trip.trip_id)
+        self._add_trip_contribution(trip)
     
     # ==================== Driver Management ====================
     
+    @_synchronized
     def create_driver(self, name: str, location: str) -> Driver:
         """
         Create and register a new driver.
@@ -82,12 +255,13 @@ class RideShareSystem:
         
         # Generate ID
         self._driver_counter += 1
-        driver_id = f"D-{self._driver_counter:04d}"
+        driver_id = _format_id("D", self._driver_counter)
         
         # Log operation BEFORE creating
         self._rollback_manager.log_operation(
             operation_type=OperationType.CREATE_DRIVER,
-            description=f"Create driver {driver_id}: {name} at {location}",
+            description="Create driver {}: {} at {}",
+            description_args=(driver_id, name, location),
             created_entity_id=driver_id,
             created_entity_type="driver"
         )
@@ -96,6 +270,7 @@ class RideShareSystem:
         driver = Driver(driver_id, name, location, zone)
         self._drivers[driver_id] = driver
         self._dispatch_engine.register_driver(driver)
+        self._track_driver(driver)
         
         return driver
     
@@ -103,14 +278,17 @@ class RideShareSystem:
         """Get a driver by ID."""
         return self._drivers.get(driver_id)
     
+    @_synchronized
     def get_all_drivers(self) -> List[Driver]:
         """Get all drivers."""
         return list(self._drivers.values())
     
+    @_synchronized
     def get_available_drivers(self) -> List[Driver]:
-        """Get all available drivers."""
-        return [d for d in self._drivers.values() if d.is_available()]
+        """Get all available drivers, read from the dispatch availability index."""
+        return self._dispatch_engine.get_available_drivers()
     
+    @_synchronized
     def update_driver_location(self, driver_id: str, new_location: str) -> bool:
         """
         Update a driver's location.
@@ -133,7 +311,8 @@ class RideShareSystem:
         # Log operation
         self._rollback_manager.log_operation(
             operation_type=OperationType.UPDATE_DRIVER_LOCATION,
-            description=f"Update driver {driver_id} location to {new_location}",
+            description="Update driver {} location to {}",
+            description_args=(driver_id, new_location),
             affected_driver_ids=[driver_id]
         )
         
@@ -142,6 +321,7 @@ class RideShareSystem:
     
     # ==================== Rider Management ====================
     
+    @_synchronized
     def create_rider(self, name: str, location: str) -> Rider:
         """
         Create and register a new rider.
@@ -161,12 +341,13 @@ class RideShareSystem:
         
         # Generate ID
         self._rider_counter += 1
-        rider_id = f"R-{self._rider_counter:04d}"
+        rider_id = _format_id("R", self._rider_counter)
         
         # Log operation
         self._rollback_manager.log_operation(
             operation_type=OperationType.CREATE_RIDER,
-            description=f"Create rider {rider_id}: {name} at {location}",
+            description="Create rider {}: {} at {}",
+            description_args=(rider_id, name, location),
             created_entity_id=rider_id,
             created_entity_type="rider"
         )
@@ -181,12 +362,14 @@ class RideShareSystem:
         """Get a rider by ID."""
         return self._riders.get(rider_id)
     
+    @_synchronized
     def get_all_riders(self) -> List[Rider]:
         """Get all riders."""
         return list(self._riders.values())
     
     # ==================== Trip Management ====================
     
+    @_synchronized
     def request_trip(
         self, 
         rider_id: str, 
@@ -211,7 +394,8 @@ class RideShareSystem:
         rider = self._riders.get(rider_id)
         if rider is None:
             raise ValueError(f"Rider {rider_id} not found")
-        if rider.has_active_trip():
+        # Read the field directly; this check runs on every request
+        if rider.current_trip_id is not None:
             raise ValueError(f"Rider {rider_id} already has an active trip")
         
         # Validate locations
@@ -225,12 +409,13 @@ class RideShareSystem:
         
         # Generate trip ID
         self._trip_counter += 1
-        trip_id = f"T-{self._trip_counter:04d}"
+        trip_id = _format_id("T", self._trip_counter)
         
         # Log operation
         self._rollback_manager.log_operation(
             operation_type=OperationType.REQUEST_TRIP,
-            description=f"Request trip {trip_id} for rider {rider_id}",
+            description="Request trip {} for rider {}",
+            description_args=(trip_id, rider_id),
             affected_rider_ids=[rider_id],
             created_entity_id=trip_id,
             created_entity_type="trip"
@@ -240,12 +425,14 @@ class RideShareSystem:
         trip = Trip(trip_id, rider_id, pickup_location, dropoff_location, 
                     pickup_zone, dropoff_zone)
         self._trips[trip_id] = trip
+        self._track_trip(trip)
         
         # Update rider
         rider.request_trip(trip_id)
         
         return trip
     
+    @_synchronized
     def assign_trip(self, trip_id: str) -> Optional[Driver]:
         """
         Assign the best available driver to a trip.
@@ -277,7 +464,8 @@ class RideShareSystem:
         # Log operation
         self._rollback_manager.log_operation(
             operation_type=OperationType.ASSIGN_TRIP,
-            description=f"Assign driver {driver.driver_id} to trip {trip_id}",
+            description="Assign driver {} to trip {}",
+            description_args=(driver.driver_id, trip_id),
             affected_driver_ids=[driver.driver_id],
             affected_trip_ids=[trip_id]
         )
@@ -285,6 +473,96 @@ class RideShareSystem:
         # Perform assignment
         return self._dispatch_engine.assign_driver_to_trip(trip)
     
+    @_synchronized
+    def assign_trips_batch(
+        self,
+        trip_ids: Optional[List[str]] = None
+    ) -> Dict[str, Optional[Driver]]:
+        """
+        Assign drivers to several requested trips as one operation.
+        
+        Each round scores every remaining trip against the current driver
+        pool (read-only), then commits assignments closest-first. A trip whose
+        chosen driver was taken earlier in the round is re-scored in the next
+        round. The whole batch is logged as a single BATCH_ASSIGN operation,
+        so one rollback undoes it.
+        
+        Args:
+            trip_ids: Trips to assign, repeats ignored (default: every trip
+                still in REQUESTED state, oldest request first)
+        
+        Returns:
+            Dictionary of trip ID -> assigned Driver (None if no driver)
+        
+        Raises:
+            ValueError: If an explicitly given trip is not found
+            InvalidStateTransitionError: If an explicitly given trip is not
+                in REQUESTED state
+        """
+        if trip_ids is None:
+            # Read off the active-trip index, which assignments, cancellations
+            # and rollbacks already keep current
+            trips = sorted(
+                (trip for trip in self._active_trips.values()
+                 if trip.state == TripState.REQUESTED),
+                key=lambda trip: trip.created_at
+            )
+        else:
+            trips = []
+            # A repeated ID would be scored twice and claim a second driver
+            for trip_id in dict.fromkeys(trip_ids):
+                trip = self._trips.get(trip_id)
+                if trip is None:
+                    raise ValueError(f"Trip {trip_id} not found")
+                if trip.state != TripState.REQUESTED:
+                    raise InvalidStateTransitionError(
+                        f"Trip {trip_id} is not in REQUESTED state"
+                    )
+                trips.append(trip)
+        
+        assigned: Dict[str, Optional[Driver]] = {trip.trip_id: None for trip in trips}
+        logged = False
+        
+        while trips:
+            # Scoring phase: no state changes
+            proposals = []
+            for trip in trips:
+                result = self._dispatch_engine.find_best_driver(trip.pickup_location)
+                if result is not None:
+                    driver, distance, _ = result
+                    proposals.append((distance, trip, driver))
+            
+            if not proposals:
+                break
+            
+            if not logged:
+                # Only currently available drivers can be picked, so their
+                # snapshots cover every driver the batch may change
+                self._rollback_manager.log_operation(
+                    operation_type=OperationType.BATCH_ASSIGN,
+                    description="Batch assign {} trips",
+                    description_args=(len(trips),),
+                    affected_driver_ids=[
+                        d.driver_id for d in self._dispatch_engine.get_available_drivers()
+                    ],
+                    affected_trip_ids=[trip.trip_id for trip in trips]
+                )
+                logged = True
+            
+            # Commit phase: closest pickups first, conflicts retry next round
+            proposals.sort(key=lambda proposal: proposal[0])
+            conflicts = []
+            for _, trip, driver in proposals:
+                if not driver.is_available():
+                    conflicts.append(trip)
+                elif self._dispatch_engine.assign_driver(trip, driver):
+                    assigned[trip.trip_id] = driver
+            
+            trips = conflicts
+        
+        return assigned
+    
+    @_synchronized
     def start_trip(self, trip_id: str) -> bool:
         """
         Start a trip (driver picked up rider).
@@ -302,13 +580,15 @@ class RideShareSystem:
         # Log operation
         self._rollback_manager.log_operation(
             operation_type=OperationType.START_TRIP,
-            description=f"Start trip {trip_id}",
+            description="Start trip {}",
+            description_args=(trip_id,),
             affected_trip_ids=[trip_id]
         )
         
         trip.start_trip()
         return True
     
+    @_synchronized
     def complete_trip(self, trip_id: str, actual_duration: Optional[float] = None) -> bool:
         """
         Complete a trip.
@@ -331,7 +611,8 @@ class RideShareSystem:
         affected_drivers = [trip.driver_id] if trip.driver_id else []
         self._rollback_manager.log_operation(
             operation_type=OperationType.COMPLETE_TRIP,
-            description=f"Complete trip {trip_id}",
+            description="Complete trip {}",
+            description_args=(trip_id,),
             affected_driver_ids=affected_drivers,
             affected_rider_ids=[trip.rider_id],
             affected_trip_ids=[trip_id]
@@ -354,6 +635,7 @@ class RideShareSystem:
         
         return True
     
+    @_synchronized
     def cancel_trip(self, trip_id: str) -> bool:
         """
         Cancel a trip.
@@ -375,7 +657,8 @@ class RideShareSystem:
         affected_drivers = [trip.driver_id] if trip.driver_id else []
         self._rollback_manager.log_operation(
             operation_type=OperationType.CANCEL_TRIP,
-            description=f"Cancel trip {trip_id}",
+            description="Cancel trip {}",
+            description_args=(trip_id,),
             affected_driver_ids=affected_drivers,
             affected_rider_ids=[trip.rider_id],
             affected_trip_ids=[trip_id]
@@ -398,14 +681,17 @@ class RideShareSystem:
         """Get a trip by ID."""
         return self._trips.get(trip_id)
     
+    @_synchronized
     def get_all_trips(self) -> List[Trip]:
         """Get all trips."""
         return list(self._trips.values())
     
+    @_synchronized
     def get_active_trips(self) -> List[Trip]:
-        """Get all active (non-terminal) trips."""
-        return [t for t in self._trips.values() if not t.is_terminal()]
+        """Get all active (non-terminal) trips from the active-trip index."""
+        return list(self._active_trips.values())
     
+    @_synchronized
     def get_trip_estimate(
         self, 
         pickup_location: str, 
@@ -427,63 +713,75 @@ class RideShareSystem:
     
     # ==================== Analytics ====================
     
+    @_synchronized
     def get_analytics(self) -> Dict:
         """
         Get comprehensive system analytics.
         
+        Trip figures come from running aggregates, driver utilization from
+        the per-driver rate table and driver counts from the dispatch
+        engine's status index, so no Python-level loop over entities runs.
+        The result is reused until a trip, driver or rider changes; each
+        call returns a copy the caller may modify.
+        
         Returns:
             Dictionary containing various metrics
         """
-        all_trips = list(self._trips.values())
-        completed_trips = [t for t in all_trips if t.state == TripState.COMPLETED]
-        cancelled_trips = [t for t in all_trips if t.state == TripState.CANCELLED]
-        active_trips = [t for t in all_trips if not t.is_terminal()]
+        # Driver status changes show up in the engine's zone table
+        zone_statistics = self._dispatch_engine.get_zone_statistics()
+        cached = self._analytics
+        if (cached is not None
+                and cached["zone_statistics"] == zone_statistics
+                and cached["total_drivers"] == len(self._drivers)
+                and cached["total_riders"] == len(self._riders)):
+            return {**cached, "zone_statistics": zone_statistics}
+        
+        counts = self._trip_state_counts
+        total_trips = len(self._trips)
+        completed = counts[TripState.COMPLETED]
+        cancelled = counts[TripState.CANCELLED]
+        active = total_trips - completed - cancelled
         
         # Calculate average trip distance
-        avg_distance = 0.0
-        if completed_trips:
-            total_distance = sum(t.distance for t in completed_trips)
-            avg_distance = total_distance / len(completed_trips)
-        
-        # Calculate driver utilization
-        all_drivers = list(self._drivers.values())
-        total_utilization = 0.0
-        active_drivers = 0
-        
-        for driver in all_drivers:
-            util = driver.get_utilization_rate()
-            if driver.total_trips > 0 or driver.active_time > 0:
-                total_utilization += util
-                active_drivers += 1
-        
-        avg_utilization = total_utilization / active_drivers if active_drivers > 0 else 0.0
-        
-        # Calculate revenue
-        total_revenue = sum(t.cost for t in completed_trips)
-        
-        # Calculate cross-zone stats
-        cross_zone_completed = [t for t in completed_trips if t.is_cross_zone]
-        
-        return {
-            "total_trips": len(all_trips),
-            "completed_trips": len(completed_trips),
-            "cancelled_trips": len(cancelled_trips),
-            "active_trips": len(active_trips),
-            "completion_rate": len(completed_trips) / len(all_trips) if all_trips else 0.0,
-            "cancellation_rate": len(cancelled_trips) / len(all_trips) if all_trips else 0.0,
+        avg_distance = self._completed_distance / completed if completed else 0.0
+        
+        # Calculate driver utilization with a C-level sum over the rate table
+        utilization = self._driver_utilization
+        avg_utilization = sum(utilization.values()) / len(utilization) if utilization else 0.0
+        
+        # Fleet-wide driver counts fall out of the per-zone statistics
+        available_drivers = 0
+        busy_drivers = 0
+        for zone_stats in zone_statistics.values():
+            available_drivers += zone_stats["available"]
+            busy_drivers += zone_stats["busy"]
+        
+        self._analytics = {
+            "total_trips": total_trips,
+            "completed_trips": completed,
+            "cancelled_trips": cancelled,
+            "active_trips": active,
+            "completion_rate": completed / total_trips if total_trips else 0.0,
+            "cancellation_rate": cancelled / total_trips if total_trips else 0.0,
             "average_trip_distance": round(avg_distance, 2),
-            "total_distance_covered": round(sum(t.distance for t in completed_trips), 2),
+            "total_distance_covered": round(self._completed_distance, 2),
             "average_driver_utilization": round(avg_utilization, 4),
-            "total_drivers": len(all_drivers),
-            "available_drivers": len([d for d in all_drivers if d.is_available()]),
-            "busy_drivers": len([d for d in all_drivers if d.status == DriverStatus.BUSY]),
-            "total_revenue": round(total_revenue, 2),
-            "cross_zone_trips": len(cross_zone_completed),
-            "cross_zone_percentage": len(cross_zone_completed) / len(completed_trips) if completed_trips else 0.0,
+            "total_drivers": len(self._drivers),
+            "available_drivers": available_drivers,
+            "busy_drivers": busy_drivers,
+            "total_revenue": round(self._completed_revenue, 2),
+            "cross_zone_trips": self._cross_zone_completed,
+            "cross_zone_percentage": self._cross_zone_completed / completed if completed else 0.0,
             "total_riders": len(self._riders),
-            "zone_statistics": self._dispatch_engine.get_zone_statistics()
+            "zone_statistics": zone_statistics
+        }
+        # The cached result keeps its own zone table, the caller gets a copy
+        return {
+            **self._analytics,
+            "zone_statistics": {zone: dict(stats) for zone, stats in zone_statistics.items()}
         }
     
+    @_synchronized
     def get_driver_analytics(self, driver_id: str) -> Optional[Dict]:
         """
         Get analytics for a specific driver.
@@ -498,10 +796,6 @@ class RideShareSystem:
         if driver is None:
             return None
         
-        driver_trips = [t for t in self._trips.values() if t.driver_id == driver_id]
-        completed = [t for t in driver_trips if t.state == TripState.COMPLETED]
-        cancelled = [t for t in driver_trips if t.state == TripState.CANCELLED]
-        
         return {
             "driver_id": driver_id,
             "name": driver.name,
@@ -510,14 +804,27 @@ class RideShareSystem:
             "utilization_rate": round(driver.get_utilization_rate(), 4),
             "active_time": round(driver.active_time, 2),
             "idle_time": round(driver.idle_time, 2),
-            "cancelled_trips": len(cancelled),
-            "total_earnings": round(sum(t.cost for t in completed), 2),
-            "current_status": driver.status.value,
+            "cancelled_trips": len(self._driver_cancelled.get(driver_id, ())),
+            "total_earnings": round(sum(self._driver_completed.get(driver_id, {}).values()), 2),
+            "current_status": driver.status.text,
             "current_zone": driver.zone
         }
     
     # ==================== Rollback Operations ====================
     
+    def _resync_dispatch(self) -> None:
+        """
+        Register any system driver the dispatch engine is missing.
+        
+        The entity observer already re-registers drivers restored by a
+        rollback, so this is a single O(D) pass kept as a guard.
+        """
+        registered = self._dispatch_engine.get_driver_ids()
+        for driver_id, driver in self._drivers.items():
+            if driver_id not in registered:
+                self._dispatch_engine.register_driver(driver)
+    
+    @_synchronized
     def rollback_last(self) -> Optional[Dict]:
         """
         Rollback the most recent operation.
@@ -530,18 +837,16 @@ class RideShareSystem:
         if operation is None:
             return None
         
-        # Re-sync dispatch engine with current driver states
-        for driver in self._drivers.values():
-            if driver.driver_id not in [d.driver_id for d in self._dispatch_engine.get_all_drivers()]:
-                self._dispatch_engine.register_driver(driver)
+        self._resync_dispatch()
         
         return {
-            "operation_id": operation.operation_id,
-            "operation_type": operation.operation_type.value,
+            "operation_id": operation.operation_id_str,
+            "operation_type": operation.operation_type.text,
             "description": operation.description,
-            "timestamp": operation.timestamp.isoformat()
+            "timestamp": operation.timestamp_iso
         }
     
+    @_synchronized
     def rollback_k(self, k: int) -> List[Dict]:
         """
         Rollback the last K operations.
@@ -554,17 +859,14 @@ class RideShareSystem:
         """
         operations = self._rollback_manager.rollback_k(k)
         
-        # Re-sync dispatch engine
-        for driver in self._drivers.values():
-            if driver.driver_id not in [d.driver_id for d in self._dispatch_engine.get_all_drivers()]:
-                self._dispatch_engine.register_driver(driver)
+        self._resync_dispatch()
         
         return [
             {
-                "operation_id": op.operation_id,
-                "operation_type": op.operation_type.value,
+                "operation_id": op.operation_id_str,
+                "operation_type": op.operation_type.text,
                 "description": op.description,
-                "timestamp": op.timestamp.isoformat()
+                "timestamp": op.timestamp_iso
             }
             for op in operations
         ]
@@ -573,6 +875,7 @@ class RideShareSystem:
         """Check if rollback is available."""
         return self._rollback_manager.can_rollback()
     
+    @_synchronized
     def get_rollback_history(self, count: int = 10) -> List[Dict]:
         """Get recent operation history for rollback."""
         return self._rollback_manager.get_history(count)
@@ -583,12 +886,14 @@ class RideShareSystem:
         """Get the city graph."""
         return self._city
     
+    @_synchronized
     def get_shortest_path(self, start: str, end: str) -> Tuple[List[str], float]:
         """Get shortest path between two locations."""
         return self._city.shortest_path(start, end)
     
     # ==================== Serialization ====================
     
+    @_synchronized
     def to_dict(self) -> Dict:
         """
         Serialize the entire system state to a dictionary.
@@ -596,6 +901,8 @@ class RideShareSystem:
         Returns:
             Complete system state as dictionary
         """
+        # Analytics come from running aggregates, so every entity is
+        # traversed once, for its own serialization
         return {
             "city": self._city.to_dict(),
             "drivers": [d.to_dict() for d in self._drivers.values()],
@@ -6,7 +6,8 @@ This module defines the Rider class with:
 - Trip history tracking
 """
 
-from typing import Optional, List
+from typing import Optional, List, NamedTuple
+import sys
 
 
 class Rider:
@@ -20,6 +21,11 @@ class Rider:
         trip_history: List of trip IDs this rider has taken
     """
     
+    __slots__ = (
+        "rider_id", "name", "current_location", "trip_history",
+        "current_trip_id", "total_trips", "total_distance", "total_spent"
+    )
+    
     def __init__(
         self,
         rider_id: str,
@@ -28,7 +34,7 @@ class Rider:
     ):
         self.rider_id = rider_id
         self.name = name
-        self.current_location = current_location
+        self.current_location = sys.intern(current_location)
         
         # Trip tracking
         self.trip_history: List[str] = []
@@ -74,7 +80,7 @@ class Rider:
         Args:
             new_location: New node ID
         """
-        self.current_location = new_location
+        self.current_location = sys.intern(new_location)
     
     def has_active_trip(self) -> bool:
         """Check if rider has an active trip."""
@@ -87,16 +93,18 @@ class Rider:
         Returns:
             RiderSnapshot object containing current state
         """
-        return RiderSnapshot(
-            rider_id=self.rider_id,
-            name=self.name,
-            current_location=self.current_location,
-            trip_history=self.trip_history.copy(),
-            current_trip_id=self.current_trip_id,
-            total_trips=self.total_trips,
-            total_distance=self.total_distance,
-            total_spent=self.total_spent
-        )
+        # Built in C as in Driver.create_snapshot; order must match RiderSnapshot
+        return tuple.__new__(RiderSnapshot, (
+            self.rider_id,
+            self.name,
+            self.current_location,
+            self.trip_history,
+            len(self.trip_history),
+            self.current_trip_id,
+            self.total_trips,
+            self.total_distance,
+            self.total_spent
+        ))
     
     def restore_from_snapshot(self, snapshot: 'RiderSnapshot') -> None:
         """
@@ -105,13 +113,15 @@ class Rider:
         Args:
             snapshot: RiderSnapshot to restore from
         """
-        self.name = snapshot.name
-        self.current_location = snapshot.current_location
-        self.trip_history = snapshot.trip_history.copy()
-        self.current_trip_id = snapshot.current_trip_id
-        self.total_trips = snapshot.total_trips
-        self.total_distance = snapshot.total_distance
-        self.total_spent = snapshot.total_spent
+        (_, self.name, self.current_location, trip_history, history_length,
+         self.current_trip_id, self.total_trips, self.total_distance,
+         self.total_spent) = snapshot
+        # History is append-only, so undoing is a truncation to the old length;
+        # a re-created rider copies the prefix out of the shared list instead
+        if self.trip_history is trip_history:
+            del self.trip_history[history_length:]
+        else:
+            self.trip_history = trip_history[:history_length]
     
     def to_dict(self) -> dict:
         """Convert rider to dictionary for serialization."""
@@ -128,27 +138,19 @@ class Rider:
         }
 
 
-class RiderSnapshot:
+class RiderSnapshot(NamedTuple):
     """
     Immutable snapshot of rider state for rollback purposes.
-    """
     
-    def __init__(
-        self,
-        rider_id: str,
-        name: str,
-        current_location: str,
-        trip_history: List[str],
-        current_trip_id: Optional[str],
-        total_trips: int,
-        total_distance: float,
-        total_spent: float
-    ):
-        self.rider_id = rider_id
-        self.name = name
-        self.current_location = current_location
-        self.trip_history = trip_history
-        self.current_trip_id = current_trip_id
-        self.total_trips = total_trips
-        self.total_distance = total_distance
-        self.total_spent = total_spent
+    The trip history is append-only, so the snapshot shares the rider's list
+    and records its length instead of copying it.
+    """
+    rider_id: str
+    name: str
+    current_location: str
+    trip_history: List[str]
+    history_length: int
+    current_trip_id: Optional[str]
+    total_trips: int
+    total_distance: float
+    total_spent: float
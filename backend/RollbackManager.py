@@ -7,11 +7,12 @@ This module implements:
 - Rollback of last K operations
 """
 
-from typing import Dict, List, Optional, Callable, Any
+from typing import Dict, List, Optional, Callable, Any, NamedTuple, Sequence, Tuple
 from enum import Enum
-from dataclasses import dataclass, field
 from datetime import datetime
-import copy
+import time
+from collections import deque
+from itertools import islice
 
 from Driver import Driver, DriverSnapshot
 from Rider import Rider, RiderSnapshot
@@ -28,45 +29,179 @@ class OperationType(Enum):
     COMPLETE_TRIP = "complete_trip"
     CANCEL_TRIP = "cancel_trip"
     UPDATE_DRIVER_LOCATION = "update_driver_location"
+    BATCH_ASSIGN = "batch_assign"
+
+    def __init__(self, value: str):
+        # Serialized in every history row, so skip the .value descriptor
+        self.text = value
+    
+    # Identity hash in C; see TripState.__hash__
+    __hash__ = object.__hash__
+
+
+class SnapshotDelta:
+    """
+    The fields of an entity snapshot that an operation changed, with their
+    values from before the operation. Replaces the full snapshot once the
+    operation has been applied.
+    """
+    
+    __slots__ = ("fields",)
+    
+    def __init__(self, fields: Dict[str, Any]):
+        self.fields = fields
+    
+    def apply_to(self, snapshot: NamedTuple) -> NamedTuple:
+        """Return a copy of a current snapshot with the old field values put back."""
+        # Same result as snapshot._replace(**self.fields), but the merge runs
+        # in C: fields.get(name, current) for each field, straight into a tuple
+        snapshot_type = type(snapshot)
+        return tuple.__new__(
+            snapshot_type, map(self.fields.get, snapshot_type._fields, snapshot)
+        )
+
+
+# Operation types known to change only a few fields of the drivers, riders
+# and trips they list (None = take a full snapshot of that kind). Those
+# entities are captured straight into a SnapshotDelta of just these fields.
+# Rider and trip snapshots carry history lengths that are not attributes,
+# so only drivers are narrowed for the trip lifecycle.
+_DRIVER_TRIP_FIELDS = ("status", "current_trip_id")
+_OPERATION_FIELDS: Dict[OperationType, Tuple[Optional[Tuple[str, ...]], ...]] = {
+    OperationType.UPDATE_DRIVER_LOCATION: (("current_location", "zone"), None, None),
+    OperationType.ASSIGN_TRIP: (_DRIVER_TRIP_FIELDS, None, None),
+    OperationType.BATCH_ASSIGN: (_DRIVER_TRIP_FIELDS, None, None),
+    OperationType.CANCEL_TRIP: (_DRIVER_TRIP_FIELDS, None, None),
+    OperationType.COMPLETE_TRIP: (
+        _DRIVER_TRIP_FIELDS + (
+            "current_location", "zone",
+            "total_trips", "total_distance", "active_time"
+        ),
+        None, None
+    ),
+}
+_FULL_SNAPSHOTS: Tuple[None, None, None] = (None, None, None)
+
+
+def _diff_snapshot(before: NamedTuple, after: NamedTuple) -> Dict[str, Any]:
+    """Map each field that differs between two snapshots to its value in before."""
+    return {
+        name: old
+        for name, old, new in zip(before._fields, before, after)
+        if old != new
+    }
 
 
-@dataclass
 class SystemSnapshot:
     """
     Complete snapshot of system state at a point in time.
     Used for rollback operations.
+    
+    Entries start as full entity snapshots and are compacted to
+    SnapshotDelta objects (or dropped, if unchanged) after the operation.
+    
+    Entity snapshots are shallow and never deep-copied. The only mutable
+    values they share with live entities are the append-only history lists,
+    which are stored with their length, and the trip path, which is replaced
+    but never mutated.
     """
-    driver_snapshots: Dict[str, DriverSnapshot] = field(default_factory=dict)
-    rider_snapshots: Dict[str, RiderSnapshot] = field(default_factory=dict)
-    trip_snapshots: Dict[str, TripSnapshot] = field(default_factory=dict)
-    # Track which entities existed at this point
-    existing_driver_ids: List[str] = field(default_factory=list)
-    existing_rider_ids: List[str] = field(default_factory=list)
-    existing_trip_ids: List[str] = field(default_factory=list)
+    
+    __slots__ = ("driver_snapshots", "rider_snapshots", "trip_snapshots")
+    
+    def __init__(self):
+        self.driver_snapshots: Dict[str, DriverSnapshot] = {}
+        self.rider_snapshots: Dict[str, RiderSnapshot] = {}
+        self.trip_snapshots: Dict[str, TripSnapshot] = {}
+
+
+# Shared by every operation that snapshots no entities (entity creation).
+# Nothing writes to a snapshot once it is logged, and compacting an empty
+# snapshot is a no-op, so one instance can stand in for all of them.
+_EMPTY_SNAPSHOT = SystemSnapshot()
 
 
-@dataclass
 class Operation:
     """
     Represents a single operation in the system.
     Contains all information needed to undo the operation.
     """
-    operation_id: str
-    operation_type: OperationType
-    timestamp: datetime
-    description: str
-    
-    # Snapshot of affected entities BEFORE the operation
-    before_snapshot: SystemSnapshot
-    
-    # IDs of entities affected by this operation
-    affected_driver_ids: List[str] = field(default_factory=list)
-    affected_rider_ids: List[str] = field(default_factory=list)
-    affected_trip_ids: List[str] = field(default_factory=list)
-    
-    # For entity creation operations, track the created ID
-    created_entity_id: Optional[str] = None
-    created_entity_type: Optional[str] = None  # "driver", "rider", or "trip"
+    
+    __slots__ = (
+        "operation_id", "operation_type", "timestamp_ns",
+        "description_template", "before_snapshot", "affected_driver_ids",
+        "affected_rider_ids", "affected_trip_ids", "created_entity_id",
+        "created_entity_type", "description_args", "_timestamp_iso",
+        "_description"
+    )
+    
+    def __init__(
+        self,
+        operation_id: int,
+        operation_type: OperationType,
+        timestamp_ns: int,
+        description_template: str,
+        before_snapshot: SystemSnapshot,
+        affected_driver_ids: Sequence[str] = (),
+        affected_rider_ids: Sequence[str] = (),
+        affected_trip_ids: Sequence[str] = (),
+        created_entity_id: Optional[str] = None,
+        created_entity_type: Optional[str] = None,
+        description_args: Tuple[Any, ...] = ()
+    ):
+        # Sequence number; see operation_id_str for the display form
+        self.operation_id = operation_id
+        self.operation_type = operation_type
+        # Wall-clock time in nanoseconds; see the timestamp property
+        self.timestamp_ns = timestamp_ns
+        # Formatted with description_args only when the description is read
+        self.description_template = description_template
+        
+        # Snapshot of affected entities BEFORE the operation
+        self.before_snapshot = before_snapshot
+        
+        # IDs of entities affected by this operation, as tuples the caller
+        # cannot reach; an operation without any shares the empty tuple
+        self.affected_driver_ids = affected_driver_ids
+        self.affected_rider_ids = affected_rider_ids
+        self.affected_trip_ids = affected_trip_ids
+        
+        # For entity creation operations, track the created ID
+        self.created_entity_id = created_entity_id
+        self.created_entity_type = created_entity_type  # "driver", "rider", or "trip"
+        
+        self.description_args = description_args
+        
+        # ISO timestamp and formatted description, filled in when first read
+        self._timestamp_iso: Optional[str] = None
+        self._description: Optional[str] = None
+    
+    @property
+    def operation_id_str(self) -> str:
+        """Display form of the operation ID, e.g. OP-000042."""
+        return f"OP-{self.operation_id:06d}"
+    
+    @property
+    def timestamp(self) -> datetime:
+        """Time the operation was logged, built from timestamp_ns on demand."""
+        seconds, nanoseconds = divmod(self.timestamp_ns, 1_000_000_000)
+        return datetime.fromtimestamp(seconds).replace(microsecond=nanoseconds // 1000)
+    
+    @property
+    def timestamp_iso(self) -> str:
+        """ISO 8601 timestamp, formatted once and reused by history polls."""
+        if self._timestamp_iso is None:
+            self._timestamp_iso = self.timestamp.isoformat()
+        return self._timestamp_iso
+    
+    @property
+    def description(self) -> str:
+        """Human-readable description, formatted on first read."""
+        if self._description is None:
+            if self.description_args:
+                self._description = self.description_template.format(*self.description_args)
+            else:
+                self._description = self.description_template
+        return self._description
 
 
 class OperationStack:
@@ -81,8 +216,15 @@ class OperationStack:
         
         Args:
             max_size: Maximum number of operations to store
+        
+        Raises:
+            ValueError: If max_size is less than 1
         """
-        self._stack: List[Operation] = []
+        if max_size < 1:
+            raise ValueError("Operation history must hold at least one operation")
+        
+        # A bounded deque drops the oldest operation in O(1) when full
+        self._stack: deque = deque(maxlen=max_size)
         self._max_size = max_size
     
     def push(self, operation: Operation) -> None:
@@ -92,9 +234,6 @@ class OperationStack:
         Args:
             operation: Operation to push
         """
-        if len(self._stack) >= self._max_size:
-            # Remove oldest operation to make room
-            self._stack.pop(0)
         self._stack.append(operation)
     
     def pop(self) -> Optional[Operation]:
@@ -141,7 +280,7 @@ class OperationStack:
         Returns:
             List of recent operations (most recent first)
         """
-        return list(reversed(self._stack[-count:]))
+        return list(islice(reversed(self._stack), max(count, 0)))
 
 
 class RollbackManager:
@@ -152,6 +291,9 @@ class RollbackManager:
     All state is encapsulated - no global variables are used.
     """
     
+    # Number of distinct compacted deltas kept for sharing between operations
+    DELTA_POOL_SIZE = 4096
+    
     def __init__(self, max_operations: int = 100):
         """
         Initialize the rollback manager.
@@ -161,11 +303,22 @@ class RollbackManager:
         """
         self._operation_stack = OperationStack(max_operations)
         self._operation_counter = 0
+        # Most recent operation, still holding full snapshots; compacted to
+        # deltas once the next operation is logged
+        self._uncompacted: Optional[Operation] = None
+        # Compacted deltas keyed by their (field, old value) pairs, so equal
+        # changes logged by many operations share one read-only delta
+        self._delta_pool: Dict[Tuple[Tuple[str, Any], ...], SnapshotDelta] = {}
         
         # References to system components (set during initialization)
         self._drivers: Optional[Dict[str, Driver]] = None
         self._riders: Optional[Dict[str, Rider]] = None
         self._trips: Optional[Dict[str, Trip]] = None
+        
+        # Callbacks run as callback(entity_type, entity_id, entity) when a
+        # rollback deletes a created entity, so indexes outside the entity
+        # dicts can follow
+        self._entity_observers: List[Callable[[str, str, Any], None]] = []
     
     def set_system_references(
         self,
@@ -186,61 +339,68 @@ class RollbackManager:
         self._riders = riders
         self._trips = trips
     
-    def _generate_operation_id(self) -> str:
+    def add_entity_observer(self, callback: Callable[[str, str, Any], None]) -> None:
+        """Subscribe to entities deleted by rollbacks."""
+        self._entity_observers.append(callback)
+    
+    def _notify_entity(self, entity_type: str, entity_id: str, entity: Any) -> None:
+        """Run entity observer callbacks."""
+        for callback in self._entity_observers:
+            callback(entity_type, entity_id, entity)
+    
+    def _generate_operation_id(self) -> int:
         """Generate a unique operation ID."""
         self._operation_counter += 1
-        return f"OP-{self._operation_counter:06d}"
+        return self._operation_counter
     
     def _create_system_snapshot(
         self,
         driver_ids: Optional[List[str]] = None,
         rider_ids: Optional[List[str]] = None,
-        trip_ids: Optional[List[str]] = None
+        trip_ids: Optional[List[str]] = None,
+        fields: Tuple[Optional[Tuple[str, ...]], ...] = _FULL_SNAPSHOTS
     ) -> SystemSnapshot:
         """
         Create a snapshot of specified entities.
         
+        Only the listed entities are visited, so the cost is O(affected)
+        regardless of how many entities the system holds.
+        
         Args:
-            driver_ids: List of driver IDs to snapshot (None = all)
-            rider_ids: List of rider IDs to snapshot (None = all)
-            trip_ids: List of trip IDs to snapshot (None = all)
+            driver_ids: List of driver IDs to snapshot (None = none)
+            rider_ids: List of rider IDs to snapshot (None = none)
+            trip_ids: List of trip IDs to snapshot (None = none)
+            fields: Per kind (drivers, riders, trips), the only fields to
+                capture as a SnapshotDelta, or None for a full snapshot
         
         Returns:
             SystemSnapshot containing entity states
         """
+        if not (driver_ids or rider_ids or trip_ids):
+            return _EMPTY_SNAPSHOT
+        
         snapshot = SystemSnapshot()
         
-        # Snapshot existing entity IDs
-        if self._drivers:
-            snapshot.existing_driver_ids = list(self._drivers.keys())
-        if self._riders:
-            snapshot.existing_rider_ids = list(self._riders.keys())
-        if self._trips:
-            snapshot.existing_trip_ids = list(self._trips.keys())
-        
-        # Snapshot drivers
-        if self._drivers:
-            ids_to_snapshot = driver_ids if driver_ids else list(self._drivers.keys())
-            for driver_id in ids_to_snapshot:
-                if driver_id in self._drivers:
-                    snapshot.driver_snapshots[driver_id] = \
-                        self._drivers[driver_id].create_snapshot()
-        
-        # Snapshot riders
-        if self._riders:
-            ids_to_snapshot = rider_ids if rider_ids else list(self._riders.keys())
-            for rider_id in ids_to_snapshot:
-                if rider_id in self._riders:
-                    snapshot.rider_snapshots[rider_id] = \
-                        self._riders[rider_id].create_snapshot()
-        
-        # Snapshot trips
-        if self._trips:
-            ids_to_snapshot = trip_ids if trip_ids else list(self._trips.keys())
-            for trip_id in ids_to_snapshot:
-                if trip_id in self._trips:
-                    snapshot.trip_snapshots[trip_id] = \
-                        self._trips[trip_id].create_snapshot()
+        for entities, ids, snapshots, names in zip(
+            (self._drivers, self._riders, self._trips),
+            (driver_ids, rider_ids, trip_ids),
+            (snapshot.driver_snapshots, snapshot.rider_snapshots, snapshot.trip_snapshots),
+            fields
+        ):
+            if not ids or not entities:
+                continue
+            # Filled in place: dict(pairs) does not presize from a list and
+            # measured slower at every batch size
+            for entity_id in ids:
+                entity = entities.get(entity_id)
+                if entity is None:
+                    continue
+                if names is None:
+                    snapshots[entity_id] = entity.create_snapshot()
+                else:
+                    snapshots[entity_id] = SnapshotDelta(
+                        {name: getattr(entity, name) for name in names}
+                    )
         
         return snapshot
     
@@ -252,49 +412,122 @@ class RollbackManager:
         affected_rider_ids: Optional[List[str]] = None,
         affected_trip_ids: Optional[List[str]] = None,
         created_entity_id: Optional[str] = None,
-        created_entity_type: Optional[str] = None
-    ) -> str:
+        created_entity_type: Optional[str] = None,
+        description_args: Tuple[Any, ...] = ()
+    ) -> int:
         """
         Log an operation for potential rollback.
         Must be called BEFORE the operation is performed.
         
         Args:
             operation_type: Type of operation
-            description: Human-readable description
+            description: Human-readable description, or a str.format
+                template when description_args are given
             affected_driver_ids: IDs of drivers affected by this operation
             affected_rider_ids: IDs of riders affected by this operation
             affected_trip_ids: IDs of trips affected by this operation
             created_entity_id: ID of entity being created (if applicable)
             created_entity_type: Type of entity being created (if applicable)
+            description_args: Template arguments, formatted only when the
+                description is read so logging skips the string building
         
         Returns:
-            Operation ID for reference
+            Operation ID (sequence number) for reference
         """
+        # The previous operation has been fully applied by now
+        if self._uncompacted is not None:
+            self._compact(self._uncompacted)
+        
         operation_id = self._generate_operation_id()
         
         # Create snapshot of affected entities
         snapshot = self._create_system_snapshot(
             driver_ids=affected_driver_ids,
             rider_ids=affected_rider_ids,
-            trip_ids=affected_trip_ids
+            trip_ids=affected_trip_ids,
+            fields=_OPERATION_FIELDS.get(operation_type, _FULL_SNAPSHOTS)
         )
         
         operation = Operation(
             operation_id=operation_id,
             operation_type=operation_type,
-            timestamp=datetime.now(),
-            description=description,
+            timestamp_ns=time.time_ns(),
+            description_template=description,
             before_snapshot=snapshot,
-            affected_driver_ids=affected_driver_ids or [],
-            affected_rider_ids=affected_rider_ids or [],
-            affected_trip_ids=affected_trip_ids or [],
+            affected_driver_ids=tuple(affected_driver_ids) if affected_driver_ids else (),
+            affected_rider_ids=tuple(affected_rider_ids) if affected_rider_ids else (),
+            affected_trip_ids=tuple(affected_trip_ids) if affected_trip_ids else (),
             created_entity_id=created_entity_id,
-            created_entity_type=created_entity_type
+            created_entity_type=created_entity_type,
+            description_args=description_args
         )
         
         self._operation_stack.push(operation)
+        self._uncompacted = operation
         return operation_id
     
+    def _compact(self, operation: Operation) -> None:
+        """
+        Replace an applied operation's full snapshots with deltas.
+        
+        Each entity snapshot is compared with the entity's current state:
+        unchanged entities are dropped and changed ones keep only their
+        changed fields. Entities that no longer exist keep the full snapshot.
+        Entries captured as deltas up front are trimmed the same way.
+        
+        Args:
+            operation: Operation whose changes have been applied
+        """
+        self._uncompacted = None
+        snapshot = operation.before_snapshot
+        
+        for entities, snapshots in (
+            (self._drivers, snapshot.driver_snapshots),
+            (self._riders, snapshot.rider_snapshots),
+            (self._trips, snapshot.trip_snapshots)
+        ):
+            if not entities:
+                continue
+            for entity_id in list(snapshots):
+                entity = entities.get(entity_id)
+                if entity is None:
+                    continue
+                before = snapshots[entity_id]
+                if isinstance(before, SnapshotDelta):
+                    changed = {
+                        name: old for name, old in before.fields.items()
+                        if getattr(entity, name) != old
+                    }
+                else:
+                    changed = _diff_snapshot(before, entity.create_snapshot())
+                if changed:
+                    snapshots[entity_id] = self._intern_delta(changed)
+                else:
+                    del snapshots[entity_id]
+    
+    def _intern_delta(self, fields: Dict[str, Any]) -> SnapshotDelta:
+        """
+        Get a delta for the given old field values, reusing an equal one.
+        
+        Args:
+            fields: Changed field name -> value from before the operation
+        
+        Returns:
+            A SnapshotDelta shared by every compaction with the same fields
+        """
+        try:
+            key = tuple(fields.items())
+            delta = self._delta_pool.get(key)
+        except TypeError:
+            # Unhashable old value such as a trip path; keep a private delta
+            return SnapshotDelta(fields)
+        
+        if delta is None:
+            if len(self._delta_pool) >= self.DELTA_POOL_SIZE:
+                self._delta_pool.clear()
+            delta = self._delta_pool[key] = SnapshotDelta(fields)
+        return delta
+    
     def rollback_last(self) -> Optional[Operation]:
         """
         Rollback the most recent operation.
@@ -307,6 +540,8 @@ class RollbackManager:
         if operation is None:
             return None
         
+        if operation is self._uncompacted:
+            self._uncompacted = None
         self._apply_rollback(operation)
         return operation
     
@@ -341,76 +576,28 @@ class RollbackManager:
         
         # Handle entity creation rollback (delete the created entity)
         if operation.created_entity_id and operation.created_entity_type:
-            if operation.created_entity_type == "driver" and self._drivers:
-                if operation.created_entity_id in self._drivers:
-                    del self._drivers[operation.created_entity_id]
-            elif operation.created_entity_type == "rider" and self._riders:
-                if operation.created_entity_id in self._riders:
-                    del self._riders[operation.created_entity_id]
-            elif operation.created_entity_type == "trip" and self._trips:
-                if operation.created_entity_id in self._trips:
-                    del self._trips[operation.created_entity_id]
-        
-        # Restore driver states
-        if self._drivers:
-            for driver_id, driver_snapshot in snapshot.driver_snapshots.items():
-                if driver_id in self._drivers:
-                    self._drivers[driver_id].restore_from_snapshot(driver_snapshot)
-        
-        # Restore rider states
-        if self._riders:
-            for rider_id, rider_snapshot in snapshot.rider_snapshots.items():
-                if rider_id in self._riders:
-                    self._riders[rider_id].restore_from_snapshot(rider_snapshot)
-        
-        # Restore trip states
-        if self._trips:
-            for trip_id, trip_snapshot in snapshot.trip_snapshots.items():
-                if trip_id in self._trips:
-                    self._trips[trip_id].restore_from_snapshot(trip_snapshot)
-        
-        # Restore deleted entities (entities that existed before but don't now)
-        # This handles cases where we need to restore a deleted entity
-        if self._drivers:
-            for driver_id in snapshot.existing_driver_ids:
-                if driver_id not in self._drivers and driver_id in snapshot.driver_snapshots:
-                    # Entity was deleted, restore it
-                    driver_snapshot = snapshot.driver_snapshots[driver_id]
-                    restored_driver = Driver(
-                        driver_id=driver_snapshot.driver_id,
-                        name=driver_snapshot.name,
-                        current_location=driver_snapshot.current_location,
-                        zone=driver_snapshot.zone
-                    )
-                    restored_driver.restore_from_snapshot(driver_snapshot)
-                    self._drivers[driver_id] = restored_driver
-        
-        if self._riders:
-            for rider_id in snapshot.existing_rider_ids:
-                if rider_id not in self._riders and rider_id in snapshot.rider_snapshots:
-                    rider_snapshot = snapshot.rider_snapshots[rider_id]
-                    restored_rider = Rider(
-                        rider_id=rider_snapshot.rider_id,
-                        name=rider_snapshot.name,
-                        current_location=rider_snapshot.current_location
-                    )
-                    restored_rider.restore_from_snapshot(rider_snapshot)
-                    self._riders[rider_id] = restored_rider
-        
-        if self._trips:
-            for trip_id in snapshot.existing_trip_ids:
-                if trip_id not in self._trips and trip_id in snapshot.trip_snapshots:
-                    trip_snapshot = snapshot.trip_snapshots[trip_id]
-                    restored_trip = Trip(
-                        trip_id=trip_snapshot.trip_id,
-                        rider_id=trip_snapshot.rider_id,
-                        pickup_location=trip_snapshot.pickup_location,
-                        dropoff_location=trip_snapshot.dropoff_location,
-                        pickup_zone=trip_snapshot.pickup_zone,
-                        dropoff_zone=trip_snapshot.dropoff_zone
-                    )
-                    restored_trip.restore_from_snapshot(trip_snapshot)
-                    self._trips[trip_id] = restored_trip
+            entity_id = operation.created_entity_id
+            entities = {
+                "driver": self._drivers,
+                "rider": self._riders,
+                "trip": self._trips
+            }.get(operation.created_entity_type)
+            if entities and entity_id in entities:
+                removed = entities.pop(entity_id)
+                self._notify_entity(operation.created_entity_type, entity_id, removed)
+        
+        # Restore entity states
+        for entities, snapshots in (
+            (self._drivers, snapshot.driver_snapshots),
+            (self._riders, snapshot.rider_snapshots),
+            (self._trips, snapshot.trip_snapshots)
+        ):
+            for entity_id, entity_snapshot in snapshots.items():
+                entity = entities.get(entity_id)
+                if entity is not None:
+                    if isinstance(entity_snapshot, SnapshotDelta):
+                        entity_snapshot = entity_snapshot.apply_to(entity.create_snapshot())
+                    entity.restore_from_snapshot(entity_snapshot)
     
     def can_rollback(self) -> bool:
         """Check if there are operations to rollback."""
@@ -433,13 +620,13 @@ class RollbackManager:
         operations = self._operation_stack.get_history(count)
         return [
             {
-                "operation_id": op.operation_id,
-                "operation_type": op.operation_type.value,
-                "timestamp": op.timestamp.isoformat(),
+                "operation_id": op.operation_id_str,
+                "operation_type": op.operation_type.text,
+                "timestamp": op.timestamp_iso,
                 "description": op.description,
-                "affected_drivers": op.affected_driver_ids,
-                "affected_riders": op.affected_rider_ids,
-                "affected_trips": op.affected_trip_ids
+                "affected_drivers": list(op.affected_driver_ids),
+                "affected_riders": list(op.affected_rider_ids),
+                "affected_trips": list(op.affected_trip_ids)
             }
             for op in operations
         ]
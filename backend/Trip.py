@@ -7,9 +7,11 @@ This module defines the Trip class with:
 - Distance and cost calculation
 """
 
-from typing import Optional, List
+from typing import Optional, List, Callable, NamedTuple
 from enum import Enum
 from datetime import datetime
+from functools import lru_cache
+import sys
 
 
 class TripState(Enum):
@@ -25,6 +27,22 @@ class TripState(Enum):
     COMPLETED = "completed"
     CANCELLED = "cancelled"
 
+    def __init__(self, value: str):
+        # Plain attribute copy of the value for serialization; reading
+        # .value goes through the Enum property descriptor every time
+        self.text = value
+    
+    # Members are singletons compared by identity, so the C-level identity
+    # hash is consistent with equality; Enum.__hash__ is a Python function
+    # hashing the member name, and states key several per-transition dicts
+    __hash__ = object.__hash__
+
+
+# One bit per state, so a set of states fits in a single int mask
+for _index, _state in enumerate(TripState):
+    _state.bit = 1 << _index
+del _index, _state
+
 
 class InvalidStateTransitionError(Exception):
     """Raised when an invalid state transition is attempted."""
@@ -58,6 +76,20 @@ class Trip:
         TripState.CANCELLED: [],  # Terminal state
     }
     
+    # VALID_TRANSITIONS compiled to bit masks of the allowed next states
+    _TRANSITION_MASKS = {
+        state: sum(next_state.bit for next_state in next_states)
+        for state, next_states in VALID_TRANSITIONS.items()
+    }
+    
+    __slots__ = (
+        "trip_id", "rider_id", "driver_id", "pickup_location",
+        "dropoff_location", "pickup_zone", "dropoff_zone", "state",
+        "state_history", "distance", "estimated_duration", "actual_duration",
+        "cost", "path", "is_cross_zone", "created_at", "assigned_at",
+        "started_at", "completed_at", "cancelled_at", "_observers"
+    )
+    
     # Base fare and per-km rate for cost calculation
     BASE_FARE = 5.0
     PER_KM_RATE = 2.0
@@ -75,14 +107,16 @@ class Trip:
         self.trip_id = trip_id
         self.rider_id = rider_id
         self.driver_id: Optional[str] = None
-        self.pickup_location = pickup_location
-        self.dropoff_location = dropoff_location
+        self.pickup_location = sys.intern(pickup_location)
+        self.dropoff_location = sys.intern(dropoff_location)
         self.pickup_zone = pickup_zone
         self.dropoff_zone = dropoff_zone
         
         # State management
         self.state = TripState.REQUESTED
-        self.state_history: List[tuple] = [(TripState.REQUESTED, datetime.now())]
+        # One clock read shared by created_at and the first history entry
+        now = datetime.now()
+        self.state_history: List[tuple] = [(TripState.REQUESTED, now)]
         
         # Trip metrics
         self.distance: float = 0.0
@@ -95,11 +129,29 @@ class Trip:
         self.is_cross_zone = pickup_zone != dropoff_zone
         
         # Timestamps
-        self.created_at = datetime.now()
+        self.created_at = now
         self.assigned_at: Optional[datetime] = None
         self.started_at: Optional[datetime] = None
         self.completed_at: Optional[datetime] = None
         self.cancelled_at: Optional[datetime] = None
+        
+        # Callbacks run as callback(trip, old_state) after every state
+        # transition and snapshot restore, so aggregates built on them stay current
+        self._observers: List[Callable[['Trip', TripState], None]] = []
+    
+    def add_observer(self, callback: Callable[['Trip', TripState], None]) -> None:
+        """Subscribe to state changes of this trip."""
+        self._observers.append(callback)
+    
+    def remove_observer(self, callback: Callable[['Trip', TripState], None]) -> None:
+        """Unsubscribe a previously added callback."""
+        if callback in self._observers:
+            self._observers.remove(callback)
+    
+    def _notify(self, old_state: TripState) -> None:
+        """Run observer callbacks."""
+        for callback in self._observers:
+            callback(self, old_state)
     
     def can_transition_to(self, new_state: TripState) -> bool:
         """
@@ -111,25 +163,32 @@ class Trip:
         Returns:
             True if transition is valid, False otherwise
         """
-        return new_state in self.VALID_TRANSITIONS.get(self.state, [])
+        return self._TRANSITION_MASKS[self.state] & new_state.bit != 0
     
-    def _transition(self, new_state: TripState) -> None:
+    def _transition(self, new_state: TripState) -> datetime:
         """
         Internal method to perform state transition.
         
         Args:
             new_state: The state to transition to
         
+        Returns:
+            Time of the transition, as recorded in the state history
+        
         Raises:
             InvalidStateTransitionError: If transition is not valid
         """
-        if not self.can_transition_to(new_state):
+        if not self._TRANSITION_MASKS[self.state] & new_state.bit:
             raise InvalidStateTransitionError(
                 f"Cannot transition from {self.state.value} to {new_state.value}"
             )
         
+        old_state = self.state
+        now = datetime.now()
         self.state = new_state
-        self.state_history.append((new_state, datetime.now()))
+        self.state_history.append((new_state, now))
+        self._notify(old_state)
+        return now
     
     def assign_driver(self, driver_id: str, distance: float, path: List[str]) -> None:
         """
@@ -143,12 +202,11 @@ class Trip:
         Raises:
             InvalidStateTransitionError: If trip is not in REQUESTED state
         """
-        self._transition(TripState.ASSIGNED)
+        self.assigned_at = self._transition(TripState.ASSIGNED)
         
         self.driver_id = driver_id
         self.distance = distance
         self.path = path
-        self.assigned_at = datetime.now()
         
         # Calculate estimated duration (assume 30 km/h average speed)
         self.estimated_duration = (distance / 30) * 60  # Minutes
@@ -163,8 +221,7 @@ class Trip:
         Raises:
             InvalidStateTransitionError: If trip is not in ASSIGNED state
         """
-        self._transition(TripState.ONGOING)
-        self.started_at = datetime.now()
+        self.started_at = self._transition(TripState.ONGOING)
     
     def complete_trip(self, actual_duration: Optional[float] = None) -> None:
         """
@@ -176,8 +233,7 @@ class Trip:
         Raises:
             InvalidStateTransitionError: If trip is not in ONGOING state
         """
-        self._transition(TripState.COMPLETED)
-        self.completed_at = datetime.now()
+        self.completed_at = self._transition(TripState.COMPLETED)
         
         if actual_duration is not None:
             self.actual_duration = actual_duration
@@ -191,8 +247,7 @@ class Trip:
         Raises:
             InvalidStateTransitionError: If trip cannot be cancelled
         """
-        self._transition(TripState.CANCELLED)
-        self.cancelled_at = datetime.now()
+        self.cancelled_at = self._transition(TripState.CANCELLED)
     
     def _calculate_cost(self, distance: float) -> float:
         """
@@ -204,13 +259,7 @@ class Trip:
         Returns:
             Total trip cost
         """
-        base_cost = self.BASE_FARE + (distance * self.PER_KM_RATE)
-        
-        # Apply cross-zone penalty
-        if self.is_cross_zone:
-            base_cost *= self.CROSS_ZONE_PENALTY
-        
-        return round(base_cost, 2)
+        return _fare(distance, self.is_cross_zone)
     
     def is_terminal(self) -> bool:
         """Check if trip is in a terminal state."""
@@ -223,28 +272,30 @@ class Trip:
         Returns:
             TripSnapshot object containing current state
         """
-        return TripSnapshot(
-            trip_id=self.trip_id,
-            rider_id=self.rider_id,
-            driver_id=self.driver_id,
-            pickup_location=self.pickup_location,
-            dropoff_location=self.dropoff_location,
-            pickup_zone=self.pickup_zone,
-            dropoff_zone=self.dropoff_zone,
-            state=self.state,
-            state_history=self.state_history.copy(),
-            distance=self.distance,
-            estimated_duration=self.estimated_duration,
-            actual_duration=self.actual_duration,
-            cost=self.cost,
-            path=self.path.copy(),
-            is_cross_zone=self.is_cross_zone,
-            created_at=self.created_at,
-            assigned_at=self.assigned_at,
-            started_at=self.started_at,
-            completed_at=self.completed_at,
-            cancelled_at=self.cancelled_at
-        )
+        # Built in C as in Driver.create_snapshot; order must match TripSnapshot
+        return tuple.__new__(TripSnapshot, (
+            self.trip_id,
+            self.rider_id,
+            self.driver_id,
+            self.pickup_location,
+            self.dropoff_location,
+            self.pickup_zone,
+            self.dropoff_zone,
+            self.state,
+            self.state_history,
+            len(self.state_history),
+            self.distance,
+            self.estimated_duration,
+            self.actual_duration,
+            self.cost,
+            self.path,
+            self.is_cross_zone,
+            self.created_at,
+            self.assigned_at,
+            self.started_at,
+            self.completed_at,
+            self.cancelled_at
+        ))
     
     def restore_from_snapshot(self, snapshot: 'TripSnapshot') -> None:
         """
@@ -253,25 +304,19 @@ class Trip:
         Args:
             snapshot: TripSnapshot to restore from
         """
-        self.rider_id = snapshot.rider_id
-        self.driver_id = snapshot.driver_id
-        self.pickup_location = snapshot.pickup_location
-        self.dropoff_location = snapshot.dropoff_location
-        self.pickup_zone = snapshot.pickup_zone
-        self.dropoff_zone = snapshot.dropoff_zone
-        self.state = snapshot.state
-        self.state_history = snapshot.state_history.copy()
-        self.distance = snapshot.distance
-        self.estimated_duration = snapshot.estimated_duration
-        self.actual_duration = snapshot.actual_duration
-        self.cost = snapshot.cost
-        self.path = snapshot.path.copy()
-        self.is_cross_zone = snapshot.is_cross_zone
-        self.created_at = snapshot.created_at
-        self.assigned_at = snapshot.assigned_at
-        self.started_at = snapshot.started_at
-        self.completed_at = snapshot.completed_at
-        self.cancelled_at = snapshot.cancelled_at
+        old_state = self.state
+        (_, self.rider_id, self.driver_id, self.pickup_location,
+         self.dropoff_location, self.pickup_zone, self.dropoff_zone,
+         self.state, state_history, history_length, self.distance,
+         self.estimated_duration, self.actual_duration, self.cost, path,
+         self.is_cross_zone, self.created_at, self.assigned_at,
+         self.started_at, self.completed_at, self.cancelled_at) = snapshot
+        if self.state_history is state_history:
+            del self.state_history[history_length:]
+        else:
+            self.state_history = state_history[:history_length]
+        self.path = path
+        self._notify(old_state)
     
     def to_dict(self) -> dict:
         """Convert trip to dictionary for serialization."""
@@ -283,7 +328,7 @@ class Trip:
             "dropoff_location": self.dropoff_location,
             "pickup_zone": self.pickup_zone,
             "dropoff_zone": self.dropoff_zone,
-            "state": self.state.value,
+            "state": self.state.text,
             "distance": self.distance,
             "estimated_duration": self.estimated_duration,
             "actual_duration": self.actual_duration,
@@ -298,51 +343,49 @@ class Trip:
         }
 
 
-class TripSnapshot:
+@lru_cache(maxsize=4096)
+def _fare(distance: float, is_cross_zone: bool) -> float:
     """
-    Immutable snapshot of trip state for rollback purposes.
+    Cost of a trip, memoized on the exact route distance.
+    
+    Route distances come from a fixed set of node pairs, so repeated
+    assignments (e.g. after a rollback) hit the cache.
     """
+    base_cost = Trip.BASE_FARE + (distance * Trip.PER_KM_RATE)
     
-    def __init__(
-        self,
-        trip_id: str,
-        rider_id: str,
-        driver_id: Optional[str],
-        pickup_location: str,
-        dropoff_location: str,
-        pickup_zone: str,
-        dropoff_zone: str,
-        state: TripState,
-        state_history: List[tuple],
-        distance: float,
-        estimated_duration: float,
-        actual_duration: float,
-        cost: float,
-        path: List[str],
-        is_cross_zone: bool,
-        created_at: datetime,
-        assigned_at: Optional[datetime],
-        started_at: Optional[datetime],
-        completed_at: Optional[datetime],
-        cancelled_at: Optional[datetime]
-    ):
-        self.trip_id = trip_id
-        self.rider_id = rider_id
-        self.driver_id = driver_id
-        self.pickup_location = pickup_location
-        self.dropoff_location = dropoff_location
-        self.pickup_zone = pickup_zone
-        self.dropoff_zone = dropoff_zone
-        self.state = state
-        self.state_history = state_history
-        self.distance = distance
-        self.estimated_duration = estimated_duration
-        self.actual_duration = actual_duration
-        self.cost = cost
-        self.path = path
-        self.is_cross_zone = is_cross_zone
-        self.created_at = created_at
-        self.assigned_at = assigned_at
-        self.started_at = started_at
-        self.completed_at = completed_at
-        self.cancelled_at = cancelled_at
+    # Apply cross-zone penalty
+    if is_cross_zone:
+        base_cost *= Trip.CROSS_ZONE_PENALTY
+    
+    return round(base_cost, 2)
+
+
+class TripSnapshot(NamedTuple):
+    """
+    Immutable snapshot of trip state for rollback purposes.
+    
+    The state history is append-only, so the snapshot shares the trip's list
+    and records its length instead of copying it. The path is only ever
+    replaced, never mutated, so the snapshot keeps a reference to it.
+    """
+    trip_id: str
+    rider_id: str
+    driver_id: Optional[str]
+    pickup_location: str
+    dropoff_location: str
+    pickup_zone: str
+    dropoff_zone: str
+    state: TripState
+    state_history: List[tuple]
+    history_length: int
+    distance: float
+    estimated_duration: float
+    actual_duration: float
+    cost: float
+    path: List[str]
+    is_cross_zone: bool
+    created_at: datetime
+    assigned_at: Optional[datetime]
+    started_at: Optional[datetime]
+    completed_at: Optional[datetime]
+    cancelled_at: Optional[datetime]
@@ -15,14 +15,18 @@ Contains 10+ test cases covering:
 """
 
 import unittest
+import io
 import math
+import sys
+import threading
+from datetime import datetime
 from City import City, MinHeap
 from Driver import Driver, DriverStatus
 from Rider import Rider
 from Trip import Trip, TripState, InvalidStateTransitionError
 from DispatchEngine import DispatchEngine
-from RollbackManager import RollbackManager, OperationType
-from RideShareSystem import RideShareSystem
+from RollbackManager import RollbackManager, OperationType, SnapshotDelta
+from RideShareSystem import RideShareSystem, ID_CACHE_SIZE, _format_id
 
 
 class TestMinHeap(unittest.TestCase):
@@ -58,6 +62,38 @@ class TestMinHeap(unittest.TestCase):
         dist, node = heap.extract_min()
         self.assertEqual(dist, 2.0)
         self.assertEqual(node, "node_a")
+    
+    def test_duplicate_entries_without_position_tracking(self):
+        """Test lazy-deletion mode accepts repeated pushes of a node."""
+        heap = MinHeap(track_positions=False)
+        
+        heap.insert(10.0, "node_a")
+        heap.insert(4.0, "node_a")
+        heap.insert(6.0, "node_b")
+        
+        self.assertEqual(heap.extract_min(), (4.0, "node_a"))
+        self.assertEqual(heap.extract_min(), (6.0, "node_b"))
+        self.assertEqual(heap.extract_min(), (10.0, "node_a"))
+        self.assertTrue(heap.is_empty())
+
+    def test_many_entries_keep_order_and_positions(self):
+        """Test that sifting keeps heap order and the position map in sync."""
+        heap = MinHeap()
+        distances = [(i * 37) % 101 for i in range(50)]
+        for node, distance in enumerate(distances):
+            heap.insert(float(distance), f"n{node}")
+        for node in range(0, 50, 5):
+            heap.decrease_key(f"n{node}", -float(node))
+
+        for i, (_, node_id) in enumerate(heap._heap):
+            self.assertEqual(heap._positions[node_id], i)
+
+        popped = [heap.extract_min()[0] for _ in range(50)]
+        self.assertEqual(popped, sorted(popped))
+        self.assertEqual(popped[:10], [-45.0, -40.0, -35.0, -30.0, -25.0, -20.0, -15.0, -10.0, -5.0, 0.0])
+        self.assertEqual(heap._positions, {})
+        with self.assertRaises(IndexError):
+            heap.extract_min()
 
 
 class TestCity(unittest.TestCase):
@@ -103,6 +139,267 @@ class TestCity(unittest.TestCase):
         self.assertEqual(path, [])
         self.assertEqual(distance, math.inf)
     
+    def test_path_cache_invalidated_on_new_edge(self):
+        """Test that cached distances are rebuilt after the graph changes."""
+        self.assertEqual(self.city.calculate_distance("A", "D"), 9.0)
+        
+        # New shortcut must be picked up by the next query
+        self.city.add_edge("A", "D", 1.0)
+        
+        path, distance = self.city.shortest_path("A", "D")
+        self.assertEqual(path, ["A", "D"])
+        self.assertEqual(distance, 1.0)
+    
+    def test_single_queries_memoized(self):
+        """Test that repeated cold queries reuse the memoized route."""
+        self.assertEqual(self.city.shortest_path("A", "D"), (["A", "B", "C", "D"], 9.0))
+        self.assertEqual(len(self.city._pair_cache), 1)
+
+        # A shorter limit turns the cached route into a miss, not a new entry
+        self.assertEqual(self.city.shortest_path("A", "D", limit=8.0), ([], math.inf))
+        self.assertEqual(self.city.calculate_distance("A", "D"), 9.0)
+        self.assertEqual(len(self.city._pair_cache), 1)
+
+        self.city.add_edge("A", "D", 1.0)
+        self.assertEqual(self.city.shortest_path("A", "D"), (["A", "D"], 1.0))
+
+    def test_duplicate_edge_updates_distance(self):
+        """Test that re-adding a road updates it instead of duplicating it."""
+        edge_count = len(self.city.get_all_edges())
+        
+        self.city.add_edge("B", "A", 2.0)
+        
+        self.assertEqual(len(self.city.get_all_edges()), edge_count)
+        self.assertEqual(self.city.get_neighbors("A").count(("B", 2.0)), 1)
+        self.assertEqual(len(self.city.get_neighbors("B")), 2)
+        self.assertEqual(self.city.calculate_distance("A", "C"), 5.0)
+    
+    def test_mixed_one_way_and_two_way_roads(self):
+        """Test that the road list follows roads overriding each other's directions."""
+        def roads():
+            return sorted(
+                (edge.from_node, edge.to_node, edge.distance)
+                for edge in self.city.get_all_edges()
+                if {edge.from_node, edge.to_node} == {"A", "D"}
+            )
+        
+        self.city.add_edge("A", "D", 5.0)
+        self.city.add_edge("A", "D", 2.0, bidirectional=False)
+        # The two-way road keeps only D -> A
+        self.assertEqual(roads(), [("A", "D", 2.0), ("D", "A", 5.0)])
+        
+        self.city.add_edge("A", "D", 7.0)
+        self.assertEqual(roads(), [("A", "D", 7.0)])
+        self.assertEqual(self.city.calculate_distance("A", "D"), 7.0)
+        self.assertEqual(self.city.calculate_distance("D", "A"), 7.0)
+        self.assertIn(
+            {"from_node": "A", "to_node": "D", "distance": 7.0},
+            self.city.to_dict()["edges"]
+        )
+    
+    def test_locality_ordering_preserves_paths(self):
+        """Test that RCM node renumbering does not change routing results."""
+        city = City("Reordered City", optimize_locality=True)
+        for node in self.city.get_all_nodes():
+            city.add_node(node.node_id, node.name, node.zone, node.x, node.y)
+        for edge in self.city.get_all_edges():
+            city.add_edge(edge.from_node, edge.to_node, edge.distance)
+        
+        for start in ("A", "B", "C", "D"):
+            for end in ("A", "B", "C", "D"):
+                self.assertEqual(
+                    city.shortest_path(start, end),
+                    self.city.shortest_path(start, end)
+                )
+    
+    def test_bounded_shortest_path(self):
+        """Test that targets beyond the limit are reported unreachable."""
+        # Cold cache takes the bounded single-search path
+        self.assertEqual(self.city.shortest_path("A", "D", limit=8.0), ([], math.inf))
+        self.assertEqual(
+            self.city.shortest_path("A", "C", limit=7.0),
+            (["A", "B", "C"], 7.0)
+        )
+        
+        # Warm cache gives the same answers
+        self.city.calculate_distance("A", "D")
+        self.assertEqual(self.city.shortest_path("A", "D", limit=8.0), ([], math.inf))
+        self.assertEqual(
+            self.city.shortest_path("A", "C", limit=7.0),
+            (["A", "B", "C"], 7.0)
+        )
+    
+    def test_cold_queries_match_cached_paths(self):
+        """Test that bidirectional search on a stale cache matches the cache."""
+        city = City.create_sample_city()
+        city.add_edge("C2", "A1", 4.0, bidirectional=False)
+        node_ids = [node.node_id for node in city.get_all_nodes()]
+        
+        # Single queries do not rebuild the cache
+        cold = {
+            (start, end): city.shortest_path(start, end)
+            for start in node_ids for end in node_ids
+        }
+        
+        city.sssp("A1")  # rebuild the cache
+        for (start, end), (path, distance) in cold.items():
+            self.assertEqual(distance, city.calculate_distance(start, end))
+            self.assertEqual(path[0], start)
+            self.assertEqual(path[-1], end)
+    
+    def test_astar_matches_dijkstra_on_metric_city(self):
+        """Test that A* on a metric city finds the same shortest paths."""
+        sample = City.create_sample_city()
+        city = City("Metric City", metric=True)
+        for node in sample.get_all_nodes():
+            city.add_node(node.node_id, node.name, node.zone, node.x, node.y)
+        for edge in sample.get_all_edges():
+            city.add_edge(edge.from_node, edge.to_node, edge.distance)
+        
+        node_ids = [node.node_id for node in sample.get_all_nodes()]
+        for start in node_ids:
+            for end in node_ids:
+                _, distance = city.shortest_path(start, end)
+                self.assertAlmostEqual(distance, sample.calculate_distance(start, end))
+
+    def test_copy_is_independent(self):
+        """Test that changing a copied city leaves the original untouched."""
+        copy = self.city.copy()
+        self.assertEqual(copy.shortest_path("A", "D"), self.city.shortest_path("A", "D"))
+
+        copy.add_edge("A", "C", 1.0)
+        copy.add_node("E", "Extra", "Zone-3", 5, 0)
+
+        self.assertEqual(self.city.calculate_distance("A", "C"), 7.0)
+        self.assertEqual([edge.distance for edge in self.city.get_all_edges()], [4.0, 3.0, 10.0, 2.0])
+        self.assertIsNone(self.city.get_node("E"))
+        self.assertEqual(copy.calculate_distance("A", "C"), 1.0)
+
+        # Sample cities come from one template but are independent as well
+        first = City.create_sample_city()
+        first.add_edge("A1", "C2", 1.0)
+        self.assertEqual(City.create_sample_city().calculate_distance("A1", "C2"), 22.0)
+
+    def test_shortest_paths_many_matches_single_queries(self):
+        """Test that a batch of queries answers like one query per pair."""
+        self.city.add_node("E", "Isolated", "Zone-3", 5, 0)
+        pairs = [("A", "C"), ("A", "D"), ("C", "A"), ("B", "D"), ("A", "E")]
+
+        batch = self.city.shortest_paths_many(pairs)
+
+        self.assertEqual(batch, [self.city.shortest_path(s, e) for s, e in pairs])
+        self.assertEqual(batch[-1], ([], math.inf))
+        with self.assertRaises(ValueError):
+            self.city.shortest_paths_many([("A", "Z")])
+
+    def test_delta_stepping_matches_dijkstra(self):
+        """Test that both all-pairs build methods agree on every distance."""
+        city = City.create_sample_city()
+        city.add_edge("C2", "A1", 4.0, bidirectional=False)
+        node_ids = [node.node_id for node in city.get_all_nodes()]
+        
+        city.build_apsp("dijkstra")
+        expected = {start: city.sssp(start) for start in node_ids}
+        
+        city.build_apsp("delta-stepping")
+        for start in node_ids:
+            self.assertEqual(city.sssp(start), expected[start])
+        
+        with self.assertRaises(ValueError):
+            city.build_apsp("bellman-ford")
+
+    def test_floyd_warshall_matches_dijkstra(self):
+        """Test that the Floyd-Warshall table agrees with Dijkstra and its paths add up."""
+        city = City.create_sample_city()
+        city.add_edge("C2", "A1", 4.0, bidirectional=False)
+        node_ids = [node.node_id for node in city.get_all_nodes()]
+
+        city.build_apsp("dijkstra")
+        expected = {start: city.sssp(start) for start in node_ids}
+
+        city.build_apsp("floyd-warshall")
+        for start in node_ids:
+            self.assertEqual(city.sssp(start), expected[start])
+            for end in node_ids:
+                path, distance = city.shortest_path(start, end)
+                self.assertEqual((path[0], path[-1]), (start, end))
+                self.assertEqual(
+                    sum(city.calculate_distance(a, b) for a, b in zip(path, path[1:])),
+                    distance
+                )
+
+        # Sample cities start with the whole table already built
+        self.assertEqual(City.create_sample_city()._rows_cached, len(node_ids))
+    
+    def test_lazy_rows_match_full_table(self):
+        """Test that on-demand rows and reverse columns match a full rebuild."""
+        city = City.create_sample_city()
+        city.add_edge("C2", "A1", 4.0, bidirectional=False)
+        node_ids = [node.node_id for node in city.get_all_nodes()]
+        
+        lazy_to = {target: dict(city.distances_to(target)) for target in node_ids}
+        lazy_from = {source: city.sssp(source) for source in node_ids[:3]}
+        
+        city.build_apsp()
+        for target in node_ids:
+            for source in node_ids:
+                self.assertEqual(lazy_to[target][source], city.calculate_distance(source, target))
+        for source, distances in lazy_from.items():
+            self.assertEqual(distances, city.sssp(source))
+    
+    def test_serialization_refreshed_after_graph_change(self):
+        """Test that the cached city dict is rebuilt when the graph changes."""
+        first = self.city.to_dict()
+        cached = self.city._serialized
+        self.assertEqual(self.city.to_dict(), first)
+        self.assertIs(self.city._serialized, cached)
+        
+        # Callers get copies, so edits do not reach later results
+        first["edges"].clear()
+        first["nodes"][0]["x"] = 99
+        first["zones"]["Zone-1"].append("Z")
+        again = self.city.to_dict()
+        self.assertEqual(len(again["edges"]), 4)
+        self.assertEqual(again["nodes"][0]["x"], 0)
+        self.assertEqual(self.city.get_nodes_in_zone("Zone-1"), ["A", "B"])
+        
+        self.city.add_edge("A", "D", 1.0)
+        refreshed = self.city.to_dict()
+        self.assertIsNot(self.city._serialized, cached)
+        self.assertIn({"from_node": "A", "to_node": "D", "distance": 1.0}, refreshed["edges"])
+    
+    def test_zone_lookup(self):
+        """Test zone lookups for known and unknown nodes."""
+        self.city.add_node("E", "Extra", "".join(["Zone", "-2"]), 4, 0)
+        
+        self.assertEqual(self.city.get_zone("E"), "Zone-2")
+        self.assertIs(self.city.get_zone("E"), self.city.get_zone("D"))
+        self.assertIsNone(self.city.get_zone("missing"))
+    
+    def test_distances_to_respects_one_way_roads(self):
+        """Test that distances_to measures travel into the target."""
+        self.city.add_node("E", "One-way", "Zone-2", 4, 0)
+        self.city.add_edge("E", "D", 1.0, bidirectional=False)
+        
+        distances = self.city.distances_to("D")
+        
+        self.assertEqual(distances["E"], 1.0)
+        self.assertEqual(distances["A"], 9.0)
+        self.assertEqual(self.city.sssp("D")["E"], math.inf)
+    
+    def test_distances_to_cache_is_bounded(self):
+        """Test that per-target distance maps are evicted least recently used."""
+        self.city.DIST_TO_CACHE_SIZE = 2
+        to_a = self.city.distances_to("A")
+        self.city.distances_to("B")
+        self.assertIs(self.city.distances_to("A"), to_a)
+        
+        # C evicts B, the least recently used map
+        self.city.distances_to("C")
+        self.assertEqual(list(self.city._dist_to), ["A", "C"])
+        self.assertIs(self.city.distances_to("A"), to_a)
+        self.assertEqual(self.city.distances_to("B")["A"], 4.0)
+    
     def test_zone_management(self):
         """Test zone-related operations."""
         zone1_nodes = self.city.get_nodes_in_zone("Zone-1")
@@ -110,6 +407,60 @@ class TestCity(unittest.TestCase):
         
         self.assertEqual(set(zone1_nodes), {"A", "B"})
         self.assertEqual(set(zone2_nodes), {"C", "D"})
+    
+    def test_ids_and_locations_are_interned(self):
+        """Test that node IDs and entity locations share one string object."""
+        self.city.add_node("".join(["N", "5"]), "Node 5", "Zone-2", 5, 0)
+        node_id = next(n for n in self.city._nodes if n == "N5")
+        
+        driver = Driver("D1", "Driver", "".join(["N", "5"]), "Zone-2")
+        rider = Rider("R1", "Rider", "".join(["N", "5"]))
+        trip = Trip(
+            "T1", "R1", "".join(["N", "5"]), "".join(["N", "5"]),
+            "Zone-2", "Zone-2"
+        )
+        
+        self.assertIs(driver.current_location, node_id)
+        self.assertIs(rider.current_location, node_id)
+        self.assertIs(trip.pickup_location, node_id)
+        self.assertIs(trip.dropoff_location, node_id)
+    
+    def test_concurrent_point_to_point_searches(self):
+        """Test that searches from several threads do not share work arrays."""
+        city = City("Grid")
+        size = 30
+        for i in range(size * size):
+            city.add_node(f"G{i}", f"Grid {i}", "Zone-1")
+        for i in range(size * size):
+            if i % size < size - 1:
+                city.add_edge(f"G{i}", f"G{i + 1}", 1.0)
+            if i < size * (size - 1):
+                city.add_edge(f"G{i}", f"G{i + size}", 1.0)
+        
+        pairs = [(f"G{i}", f"G{size * size - 1 - i}") for i in range(0, size * size, 29)]
+        # Bypass the result memo so every call runs a search
+        expected = [city._search_point_to_point(a, b, math.inf)[0] for a, b in pairs]
+        results = {}
+        
+        def search(worker):
+            results[worker] = [
+                city._search_point_to_point(a, b, math.inf)[0] for a, b in pairs
+            ]
+        
+        # Switch threads often so the searches interleave
+        interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-5)
+        try:
+            threads = [threading.Thread(target=search, args=(i,)) for i in range(4)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finally:
+            sys.setswitchinterval(interval)
+        
+        for worker in range(4):
+            self.assertEqual(results[worker], expected)
 
 
 class TestTripStateMachine(unittest.TestCase):
@@ -171,13 +522,55 @@ class TestTripStateMachine(unittest.TestCase):
         with self.assertRaises(InvalidStateTransitionError):
             self.trip.cancel()
 
+    def test_cost_per_zone_flag(self):
+        """Test that memoized costs stay separate for local and cross-zone trips."""
+        cross = Trip("T-002", "R-001", "A", "C", "Zone-1", "Zone-2")
+        self.trip.assign_driver("D-001", 5.0, ["A", "B"])
+        cross.assign_driver("D-002", 5.0, ["A", "C"])
+
+        self.assertEqual(self.trip.cost, 15.0)
+        self.assertEqual(cross.cost, 22.5)
+
+    def test_state_text_matches_value(self):
+        """Test that the cached state strings are the enum values."""
+        for state in TripState:
+            self.assertEqual(state.text, state.value)
+        self.assertEqual(self.trip.to_dict()["state"], "requested")
+
+    def test_timestamps_match_state_history(self):
+        """Test that each lifecycle timestamp is the one in the state history."""
+        self.trip.assign_driver("D-001", 5.0, ["A", "B"])
+        self.trip.start_trip()
+        self.trip.complete_trip()
+
+        times = [at for _, at in self.trip.state_history]
+        self.assertEqual(
+            times,
+            [self.trip.created_at, self.trip.assigned_at,
+             self.trip.started_at, self.trip.completed_at]
+        )
+
+    def test_transition_masks_match_table(self):
+        """Test that the compiled masks allow exactly the listed transitions."""
+        for state, next_states in Trip.VALID_TRANSITIONS.items():
+            self.trip.state = state
+            for new_state in TripState:
+                self.assertEqual(
+                    self.trip.can_transition_to(new_state),
+                    new_state in next_states
+                )
+
 
 class TestDispatchEngine(unittest.TestCase):
     """Test the DispatchEngine driver assignment."""
     
+    @classmethod
+    def setUpClass(cls):
+        """Build the sample city once; tests here do not change its roads."""
+        cls.city = City.create_sample_city()
+    
     def setUp(self):
-        """Set up city and dispatch engine."""
-        self.city = City.create_sample_city()
+        """Set up dispatch engine."""
         self.engine = DispatchEngine(self.city)
         
         # Add drivers in different zones
@@ -216,7 +609,138 @@ class TestDispatchEngine(unittest.TestCase):
         # Should assign cross-zone driver
         self.assertTrue(is_cross_zone)
         self.assertEqual(driver.zone, "Zone-B")
+        # Reported distance is the real road distance, not the penalized one
+        self.assertEqual(distance, self.city.calculate_distance("B1", "A1"))
     
+    def test_ties_go_to_earliest_registered_driver(self):
+        """Test that equally close drivers are ranked by registration order."""
+        city = City("Ties")
+        for node_id in ("P", "L", "R", "X"):
+            city.add_node(node_id, node_id, "Zone-1")
+        city.add_edge("L", "P", 1.0)
+        city.add_edge("R", "P", 1.0)
+        city.add_edge("X", "L", 5.0)
+        engine = DispatchEngine(city)
+        first = Driver("D-1", "First", "L", "Zone-1")
+        second = Driver("D-2", "Second", "R", "Zone-1")
+        third = Driver("D-3", "Third", "R", "Zone-1")
+        for driver in (first, second, third):
+            engine.register_driver(driver)
+        
+        # Leaving and re-entering L puts its bucket after R's
+        first.update_location("X", "Zone-1")
+        first.update_location("L", "Zone-1")
+        self.assertIs(engine.find_best_driver("P")[0], first)
+        
+        # Within one location too, re-entry does not cost the driver its rank
+        first.update_location("X", "Zone-1")
+        second.assign_trip("T-1")
+        second.cancel_current_trip()
+        self.assertIs(engine.find_best_driver("P")[0], second)
+    
+    def test_max_distance_excludes_far_drivers(self):
+        """Test that drivers beyond max_distance are not considered."""
+        self.driver_a1.assign_trip("T-001")
+        self.driver_a2.assign_trip("T-002")
+        
+        # Only the Zone-B driver is free, and it is farther than the bound
+        limit = self.city.calculate_distance("B1", "A1") - 1
+        self.assertIsNone(self.engine.find_best_driver("A1", max_distance=limit))
+    
+    def test_same_zone_driver_out_of_range_falls_back(self):
+        """Test that a same-zone driver beyond max_distance yields to cross-zone."""
+        self.driver_a2.assign_trip("T-002")
+        self.driver_b1.update_location("C1", "Zone-C")
+        
+        # Same zone wins even when a cross-zone driver is closer
+        driver, distance, is_cross_zone = self.engine.find_best_driver("A3")
+        self.assertEqual((driver, distance, is_cross_zone), (self.driver_a1, 10.0, False))
+        
+        driver, distance, is_cross_zone = self.engine.find_best_driver("A3", max_distance=8)
+        self.assertEqual((driver, distance, is_cross_zone), (self.driver_b1, 6.0, True))
+    
+    def test_trip_estimate_refreshed_after_graph_change(self):
+        """Test that memoized route estimates are dropped when roads change."""
+        # Own city, since the shared one must keep its roads
+        city = City.create_sample_city()
+        engine = DispatchEngine(city)
+        before = engine.calculate_trip_estimate("A1", "C2")
+        self.assertEqual(engine.calculate_trip_estimate("A1", "C2"), before)
+        
+        city.add_edge("A1", "C2", 1.0)
+        
+        after = engine.calculate_trip_estimate("A1", "C2")
+        self.assertEqual(after["path"], ["A1", "C2"])
+        self.assertEqual(after["distance"], 1.0)
+    
+    def test_indexes_follow_driver_changes(self):
+        """Test that zone/availability indexes track driver mutations."""
+        self.driver_a1.assign_trip("T-001")
+        self.driver_b1.update_location("A3", "Zone-A")
+        
+        zone_a = {d.driver_id for d in self.engine.get_available_drivers_in_zone("Zone-A")}
+        self.assertEqual(zone_a, {"D-002", "D-003"})
+        self.assertEqual(self.engine.get_available_drivers_in_zone("Zone-B"), [])
+        
+        stats = self.engine.get_zone_statistics()
+        self.assertEqual(stats["Zone-A"]["total_drivers"], 3)
+        self.assertEqual(stats["Zone-A"]["busy"], 1)
+        self.assertEqual(stats["Zone-B"]["total_drivers"], 0)
+
+    def test_zone_statistics_cached_until_driver_changes(self):
+        """Test that zone statistics are reused until a driver changes."""
+        stats = self.engine.get_zone_statistics()
+        table = self.engine._zone_stats
+        self.assertEqual(self.engine.get_zone_statistics(), stats)
+        self.assertIs(self.engine._zone_stats, table)
+
+        # Callers get copies, so edits do not reach the cached table
+        stats["Zone-A"]["busy"] = 99
+        self.assertEqual(self.engine.get_zone_statistics()["Zone-A"]["busy"], 0)
+
+        self.driver_a1.assign_trip("T-001")
+
+        refreshed = self.engine.get_zone_statistics()
+        self.assertIsNot(refreshed, stats)
+        self.assertEqual(refreshed["Zone-A"]["busy"], 1)
+        self.assertEqual(refreshed["Zone-A"]["available"], 1)
+
+    def test_move_within_zone_updates_scoring(self):
+        """Test that a location change inside one zone is seen by dispatch."""
+        self.driver_a2.update_location("A3", "Zone-A")
+        self.driver_a1.update_location("A2", "Zone-A")
+        
+        driver, distance, _ = self.engine.find_best_driver("A3")
+        self.assertEqual(driver.driver_id, "D-002")
+        self.assertEqual(distance, 0.0)
+    
+    def test_repeated_estimates_are_independent(self):
+        """Test that memoized route figures are copied into every estimate."""
+        first = self.engine.calculate_trip_estimate("A1", "C2")
+        first["cost"] = 0.0
+        first["path"].append("X")
+
+        second = self.engine.calculate_trip_estimate("A1", "C2")
+        self.assertEqual(list(second), [
+            "distance", "estimated_duration", "cost", "is_cross_zone",
+            "path", "driver_available", "driver_eta"
+        ])
+        self.assertGreater(second["cost"], 0.0)
+        self.assertEqual(second["path"][-1], "C2")
+
+    def test_driver_at_pickup_skips_distance_lookup(self):
+        """Test that a driver waiting at the pickup wins without a distance table."""
+        city = City.create_sample_city()
+        engine = DispatchEngine(city)
+        engine.register_driver(Driver("D-001", "Alice", "A1", "Zone-A"))
+        engine.register_driver(Driver("D-002", "Bob", "A2", "Zone-A"))
+
+        driver, distance, is_cross_zone = engine.find_best_driver("A2")
+
+        self.assertEqual((driver.driver_id, distance, is_cross_zone), ("D-002", 0.0, False))
+        self.assertNotIn("A2", city._dist_to)
+        self.assertIsNone(engine.find_best_driver("A2", max_distance=-1.0))
+
     def test_closest_driver_in_zone(self):
         """Test that closest driver in zone is selected."""
         # Add another driver at A1 (same location as pickup)
@@ -236,9 +760,16 @@ class TestDispatchEngine(unittest.TestCase):
 class TestRideShareSystem(unittest.TestCase):
     """Test the full RideShareSystem."""
     
+    @classmethod
+    def setUpClass(cls):
+        """Build the sample city once; each test gets a fresh system on it."""
+        cls.city = City.create_sample_city()
+    
     def setUp(self):
         """Set up a fresh system."""
-        self.system = RideShareSystem()
+        # Entities stay per-test: every test mutates them and some check the
+        # ID counters, and building them costs ~50 us against a shared city
+        self.system = RideShareSystem(self.city)
         
         # Create drivers
         self.driver1 = self.system.create_driver("Alice", "A1")
@@ -268,6 +799,50 @@ class TestRideShareSystem(unittest.TestCase):
         
         self.assertEqual(new_assigned.driver_id, assigned_driver.driver_id)
     
+    def test_batch_assignment_resolves_conflicts(self):
+        """Test that a batch gives each trip its own driver and undoes in one step."""
+        # Both pickups are closest to Alice; the second must fall back to Bob
+        trip1 = self.system.request_trip(self.rider1.rider_id, "A1", "A2")
+        trip2 = self.system.request_trip(self.rider2.rider_id, "A2", "A3")
+        
+        assigned = self.system.assign_trips_batch()
+        
+        self.assertEqual(assigned[trip1.trip_id].driver_id, self.driver1.driver_id)
+        self.assertEqual(assigned[trip2.trip_id].driver_id, self.driver2.driver_id)
+        self.assertEqual(trip2.state, TripState.ASSIGNED)
+        
+        # One rollback reverts the whole batch
+        self.system.rollback_last()
+        
+        self.assertEqual(trip1.state, TripState.REQUESTED)
+        self.assertEqual(trip2.state, TripState.REQUESTED)
+        self.assertEqual(self.driver1.status, DriverStatus.AVAILABLE)
+        self.assertEqual(self.driver2.status, DriverStatus.AVAILABLE)
+        
+        # The restored trips are picked up by the next default batch
+        assigned = self.system.assign_trips_batch()
+        self.assertEqual(set(assigned), {trip1.trip_id, trip2.trip_id})
+        self.assertEqual(trip1.state, TripState.ASSIGNED)
+    
+    def test_batch_ignores_repeated_trip_ids(self):
+        """Test that a trip listed twice in a batch takes only one driver."""
+        trip = self.system.request_trip(self.rider1.rider_id, "A1", "A2")
+        
+        assigned = self.system.assign_trips_batch([trip.trip_id, trip.trip_id])
+        
+        self.assertEqual(assigned, {trip.trip_id: self.driver1})
+        self.assertEqual(self.driver1.status, DriverStatus.BUSY)
+        self.assertEqual(self.driver2.status, DriverStatus.AVAILABLE)
+    
+    def test_default_batch_skips_handled_trips(self):
+        """Test that the default batch only takes trips still requested."""
+        trip1 = self.system.request_trip(self.rider1.rider_id, "A1", "A2")
+        trip2 = self.system.request_trip(self.rider2.rider_id, "B1", "B2")
+        self.system.assign_trip(trip1.trip_id)
+        self.system.cancel_trip(trip2.trip_id)
+        
+        self.assertEqual(self.system.assign_trips_batch(), {})
+    
     def test_7_rollback_after_cancellation(self):
         """Test 7: Rollback after cancellation."""
         trip = self.system.request_trip(self.rider1.rider_id, "A1", "A2")
@@ -309,7 +884,27 @@ class TestRideShareSystem(unittest.TestCase):
         
         self.assertEqual(trip.state, TripState.ONGOING)
         self.assertEqual(driver.total_trips, initial_trips)
-    
+
+    def test_lifecycle_rollback_restores_whole_driver(self):
+        """Test that driver deltas logged by trip operations undo every change."""
+        trip = self.system.request_trip(self.rider1.rider_id, "A1", "A3")
+        driver = self.system.assign_trip(trip.trip_id)
+        self.system.start_trip(trip.trip_id)
+        before = driver.create_snapshot()
+
+        self.system.complete_trip(trip.trip_id, 15.0)
+        snapshots = self.system._rollback_manager._operation_stack.peek().before_snapshot
+        self.assertIsInstance(snapshots.driver_snapshots[driver.driver_id], SnapshotDelta)
+
+        self.system.rollback_last()
+        self.assertEqual(driver.create_snapshot(), before)
+
+        # Undo start, assign and request
+        self.system.rollback_k(3)
+        self.assertEqual(driver.status, DriverStatus.AVAILABLE)
+        self.assertIsNone(driver.current_trip_id)
+        self.assertEqual(driver.current_location, "A1")
+
     def test_5_multiple_rollbacks(self):
         """Test 5: Multiple rollbacks."""
         # Perform several operations
@@ -385,6 +980,257 @@ class TestRideShareSystem(unittest.TestCase):
             completed_after_first
         )
     
+    def test_analytics_reused_until_state_changes(self):
+        """Test that analytics are cached and refreshed by every kind of change."""
+        analytics = self.system.get_analytics()
+        cached = self.system._analytics
+        self.assertEqual(self.system.get_analytics(), analytics)
+        self.assertIs(self.system._analytics, cached)
+
+        # Callers get copies, so edits do not reach later results
+        analytics["total_trips"] = 99
+        analytics["zone_statistics"]["Zone-A"]["available"] = 99
+        analytics = self.system.get_analytics()
+        self.assertEqual(analytics["total_trips"], 0)
+        self.assertEqual(analytics["zone_statistics"]["Zone-A"]["available"], 1)
+
+        self.system.create_rider("Extra", "C1")
+        analytics = self.system.get_analytics()
+        self.assertEqual(analytics["total_riders"], 3)
+
+        trip = self.system.request_trip(self.rider1.rider_id, "A1", "A3")
+        self.assertEqual(self.system.get_analytics()["active_trips"], 1)
+
+        self.system.assign_trip(trip.trip_id)
+        self.assertEqual(self.system.get_analytics()["busy_drivers"], 1)
+
+        self.driver2.add_idle_time(10.0)
+        self.driver2.active_time = 10.0
+        self.driver2.add_idle_time(0.0)
+        self.assertEqual(self.system.get_analytics()["average_driver_utilization"], 0.5)
+
+    def test_analytics_follow_rolled_back_creations(self):
+        """Test that analytics drop trips and drivers removed by rollback."""
+        trip = self.system.request_trip(self.rider1.rider_id, "A1", "A3")
+        self.system.assign_trip(trip.trip_id)
+        self.system.start_trip(trip.trip_id)
+        self.system.complete_trip(trip.trip_id)
+        self.system.create_driver("Carol", "C1")
+        
+        # Undo the new driver and the whole trip lifecycle
+        self.system.rollback_k(5)
+        
+        analytics = self.system.get_analytics()
+        self.assertEqual(analytics['total_trips'], 0)
+        self.assertEqual(analytics['completed_trips'], 0)
+        self.assertEqual(analytics['total_revenue'], 0)
+        self.assertEqual(analytics['total_drivers'], 2)
+        self.assertEqual(analytics['available_drivers'], 2)
+        self.assertEqual(analytics['busy_drivers'], 0)
+    
+    def test_driver_analytics_after_rollback(self):
+        """Test that per-driver trip figures follow cancellations and rollback."""
+        trip = self.system.request_trip(self.rider1.rider_id, "A1", "A2")
+        driver = self.system.assign_trip(trip.trip_id)
+        self.system.cancel_trip(trip.trip_id)
+        
+        stats = self.system.get_driver_analytics(driver.driver_id)
+        self.assertEqual(stats['cancelled_trips'], 1)
+        
+        self.system.rollback_last()
+        self.system.start_trip(trip.trip_id)
+        self.system.complete_trip(trip.trip_id)
+        
+        stats = self.system.get_driver_analytics(driver.driver_id)
+        self.assertEqual(stats['cancelled_trips'], 0)
+        self.assertEqual(stats['total_earnings'], trip.cost)
+    
+    def test_active_trips_index(self):
+        """Test that the active-trip index follows completion and rollback."""
+        trip = self.system.request_trip(self.rider1.rider_id, "A1", "A2")
+        self.assertEqual(self.system.get_active_trips(), [trip])
+        
+        self.system.assign_trip(trip.trip_id)
+        self.system.start_trip(trip.trip_id)
+        self.system.complete_trip(trip.trip_id)
+        self.assertEqual(self.system.get_active_trips(), [])
+        
+        self.system.rollback_last()
+        self.assertEqual(self.system.get_active_trips(), [trip])
+        self.system.rollback_k(3)
+        self.assertEqual(self.system.get_active_trips(), [])
+    
+    def test_dispatch_drivers_follow_rollback(self):
+        """Test that dispatch registration matches the system after rollbacks."""
+        carol = self.system.create_driver("Carol", "A2")
+        self.system.rollback_last()
+        
+        dispatch = self.system._dispatch_engine
+        self.assertNotIn(carol.driver_id, dispatch.get_driver_ids())
+        self.assertEqual(
+            set(dispatch.get_driver_ids()),
+            {self.driver1.driver_id, self.driver2.driver_id}
+        )
+        
+        self.system.rollback_k(4)
+        self.assertEqual(len(dispatch.get_driver_ids()), 0)
+    
+    def test_rider_history_truncated_on_rollback(self):
+        """Test that rolling back completions truncates the rider history."""
+        for _ in range(2):
+            trip = self.system.request_trip(self.rider1.rider_id, "A1", "A2")
+            self.system.assign_trip(trip.trip_id)
+            self.system.start_trip(trip.trip_id)
+            self.system.complete_trip(trip.trip_id)
+        first_trip_id = self.rider1.trip_history[0]
+        
+        self.system.rollback_last()
+        self.assertEqual(self.rider1.trip_history, [first_trip_id])
+        self.system.rollback_k(4)
+        self.assertEqual(self.rider1.trip_history, [])
+    
+    def test_state_history_truncated_on_rollback(self):
+        """Test that rollback trims the trip state history without copying it."""
+        trip = self.system.request_trip(self.rider1.rider_id, "A1", "A2")
+        self.system.assign_trip(trip.trip_id)
+        history = trip.state_history
+        self.system.start_trip(trip.trip_id)
+        self.assertEqual(len(trip.state_history), 3)
+        
+        self.system.rollback_last()
+        self.assertIs(trip.state_history, history)
+        self.assertEqual(
+            [state for state, _ in trip.state_history],
+            [TripState.REQUESTED, TripState.ASSIGNED]
+        )
+
+    def test_path_restored_by_reference(self):
+        """Test that rollback puts back the pre-assignment path."""
+        trip = self.system.request_trip(self.rider1.rider_id, "A1", "A2")
+        empty_path = trip.path
+        self.system.assign_trip(trip.trip_id)
+        self.assertEqual(trip.path[0], "A1")
+
+        self.system.rollback_last()
+        self.assertIs(trip.path, empty_path)
+        self.assertEqual(trip.path, [])
+
+    def test_serialized_analytics_match(self):
+        """Test that to_dict reports the same analytics as get_analytics."""
+        trip = self.system.request_trip(self.rider1.rider_id, "A1", "A2")
+        self.system.assign_trip(trip.trip_id)
+        self.system.start_trip(trip.trip_id)
+        self.system.complete_trip(trip.trip_id)
+        self.driver2.add_idle_time(30)
+        
+        state = self.system.to_dict()
+        self.assertEqual(state["analytics"], self.system.get_analytics())
+        self.assertEqual(len(state["drivers"]), 2)
+    
+    def test_entity_id_format(self):
+        """Test that cached and formatted IDs agree across the cache boundary."""
+        self.assertEqual(self.driver1.driver_id, "D-0001")
+        self.assertEqual(self.rider2.rider_id, "R-0002")
+        self.assertEqual(_format_id("T", ID_CACHE_SIZE - 1), "T-9999")
+        self.assertEqual(_format_id("T", ID_CACHE_SIZE), "T-10000")
+    
+    def test_operation_descriptions_formatted_on_read(self):
+        """Test that lazily formatted descriptions read back in full."""
+        trip = self.system.request_trip(self.rider1.rider_id, "A1", "A2")
+        history = self.system.get_rollback_history(2)
+        self.assertEqual(
+            history[0]["description"],
+            f"Request trip {trip.trip_id} for rider {self.rider1.rider_id}"
+        )
+        self.assertEqual(history[1]["description"], "Create rider R-0002: Jane at B1")
+    
+    def test_concurrent_creation(self):
+        """Test that creations from several threads get distinct IDs."""
+        def create_many():
+            for _ in range(50):
+                self.system.create_driver("Worker", "C1")
+        
+        threads = [threading.Thread(target=create_many) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        driver_ids = {d.driver_id for d in self.system.get_all_drivers()}
+        self.assertEqual(len(driver_ids), 202)
+        self.assertEqual(self.system.get_analytics()["total_drivers"], 202)
+    
+    def test_get_all_returns_snapshots(self):
+        """Test that entity listings are lists unaffected by later creations."""
+        drivers = self.system.get_all_drivers()
+        self.system.create_driver("Carol", "C1")
+        
+        self.assertIsInstance(drivers, list)
+        self.assertEqual(len(drivers), 2)
+        self.assertIsInstance(self.system.get_all_riders(), list)
+        self.assertIsInstance(self.system.get_all_trips(), list)
+    
+    def test_concurrent_queries(self):
+        """Test that path and estimate queries stay correct beside writers."""
+        city = City("Grid")
+        size = 30
+        for i in range(size * size):
+            city.add_node(f"G{i}", f"Grid {i}", f"Zone-{i % 3}")
+        for i in range(size * size):
+            if i % size < size - 1:
+                city.add_edge(f"G{i}", f"G{i + 1}", 1.0)
+            if i < size * (size - 1):
+                city.add_edge(f"G{i}", f"G{i + size}", 1.0)
+        system = RideShareSystem(city)
+        driver = system.create_driver("Mover", "G0")
+        
+        pairs = [(f"G{i}", f"G{size * size - 1 - i}") for i in range(0, size * size, 29)]
+        expected = [abs(a % size - b % size) + abs(a // size - b // size)
+                    for a, b in ((int(p[1:]), int(q[1:])) for p, q in pairs)]
+        results = {}
+        
+        def query(worker):
+            distances = []
+            estimates = []
+            for start, end in pairs:
+                distances.append(system.get_shortest_path(start, end)[1])
+                estimates.append(system.get_trip_estimate(start, end)["distance"])
+            results[worker] = (distances, estimates)
+        
+        def move():
+            for i in range(0, size * size, 9):
+                system.update_driver_location(driver.driver_id, f"G{i}")
+                system.create_driver("Worker", f"G{i}")
+        
+        interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-5)
+        try:
+            threads = [threading.Thread(target=query, args=(i,)) for i in range(4)]
+            threads.append(threading.Thread(target=move))
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finally:
+            sys.setswitchinterval(interval)
+        
+        for worker in range(4):
+            self.assertEqual(results[worker], (expected, expected))
+    
+    def test_utilization_follows_idle_time_and_rollback(self):
+        """Test that average utilization tracks idle time and rollbacks."""
+        trip = self.system.request_trip(self.rider1.rider_id, "A1", "A2")
+        driver = self.system.assign_trip(trip.trip_id)
+        self.system.start_trip(trip.trip_id)
+        self.system.complete_trip(trip.trip_id, actual_duration=30)
+        self.assertEqual(self.system.get_analytics()["average_driver_utilization"], 1.0)
+        
+        driver.add_idle_time(10)
+        self.assertEqual(self.system.get_analytics()["average_driver_utilization"], 0.75)
+        
+        self.system.rollback_last()
+        self.assertEqual(self.system.get_analytics()["average_driver_utilization"], 0.0)
+    
     def test_cross_zone_trip_cost(self):
         """Test that cross-zone trips have higher cost."""
         # Same-zone trip
@@ -425,6 +1271,10 @@ class TestRollbackManager(unittest.TestCase):
         )
         
         self.assertIsNotNone(op_id)
+        operation = self.manager._operation_stack.peek()
+        self.assertEqual(operation.operation_id, op_id)
+        self.assertEqual(operation.operation_id_str, f"OP-{op_id:06d}")
+        self.assertEqual(self.manager.get_history(1)[0]["operation_id"], operation.operation_id_str)
         self.assertEqual(self.manager.get_operation_count(), 1)
     
     def test_rollback_restores_state(self):
@@ -468,6 +1318,254 @@ class TestRollbackManager(unittest.TestCase):
         
         self.assertEqual(len(rolled_back), 2)
         self.assertEqual(self.manager.get_operation_count(), 1)
+    
+    def test_applied_operations_keep_only_deltas(self):
+        """Test that earlier operations store changed fields and still roll back."""
+        driver = self.drivers["D-001"]
+        self.drivers["D-002"] = Driver("D-002", "Idle", "C1", "Zone-C")
+        
+        self.manager.log_operation(
+            operation_type=OperationType.UPDATE_DRIVER_LOCATION,
+            description="Move",
+            affected_driver_ids=["D-001", "D-002"]
+        )
+        driver.update_location("B1", "Zone-B")
+        self.manager.log_operation(
+            operation_type=OperationType.UPDATE_DRIVER_LOCATION,
+            description="Move again",
+            affected_driver_ids=["D-001"]
+        )
+        driver.update_location("C1", "Zone-C")
+        
+        first = self.manager._operation_stack.get_history(2)[1]
+        delta = first.before_snapshot.driver_snapshots
+        self.assertEqual(list(delta), ["D-001"])
+        self.assertEqual(delta["D-001"].fields, {"current_location": "A1", "zone": "Zone-A"})
+        
+        self.manager.rollback_k(2)
+        self.assertEqual((driver.current_location, driver.zone), ("A1", "Zone-A"))
+
+    def test_repeated_changes_share_one_delta(self):
+        """Test that identical compacted changes are stored once."""
+        driver = self.drivers["D-001"]
+
+        # Bounce between two locations: every other operation is identical
+        for location, zone in [("B1", "Zone-B"), ("A1", "Zone-A")] * 2:
+            self.manager.log_operation(
+                operation_type=OperationType.UPDATE_DRIVER_LOCATION,
+                description="Move",
+                affected_driver_ids=["D-001"]
+            )
+            driver.update_location(location, zone)
+        self.manager.log_operation(
+            operation_type=OperationType.UPDATE_DRIVER_LOCATION,
+            description="Move",
+            affected_driver_ids=["D-001"]
+        )
+
+        history = self.manager._operation_stack.get_history(5)
+        deltas = [op.before_snapshot.driver_snapshots["D-001"] for op in history[1:]]
+        self.assertIs(deltas[0], deltas[2])
+        self.assertIs(deltas[1], deltas[3])
+        self.assertIsNot(deltas[0], deltas[1])
+
+        self.manager.rollback_k(5)
+        self.assertEqual((driver.current_location, driver.zone), ("A1", "Zone-A"))
+
+    def test_snapshot_covers_only_affected_entities(self):
+        """Test that logging snapshots just the listed entities."""
+        self.drivers["D-002"] = Driver("D-002", "Other", "C1", "Zone-C")
+        
+        self.manager.log_operation(
+            operation_type=OperationType.CREATE_RIDER,
+            description="Create rider",
+            created_entity_id="R-001",
+            created_entity_type="rider"
+        )
+        self.manager.log_operation(
+            operation_type=OperationType.UPDATE_DRIVER_LOCATION,
+            description="Move",
+            affected_driver_ids=["D-002"]
+        )
+        
+        latest, creation = self.manager._operation_stack.get_history(2)
+        self.assertEqual(creation.before_snapshot.driver_snapshots, {})
+        self.assertEqual(list(latest.before_snapshot.driver_snapshots), ["D-002"])
+    
+    def test_snapshots_fill_every_field(self):
+        """Test that positionally built snapshots match their field lists."""
+        rider = Rider("R-001", "Rider", "A1")
+        trip = Trip("T-001", "R-001", "A1", "B1", "Zone-A", "Zone-B")
+
+        for entity in (self.drivers["D-001"], rider, trip):
+            snapshot = entity.create_snapshot()
+            self.assertEqual(len(snapshot), len(type(snapshot)._fields))
+            self.assertEqual(snapshot, type(snapshot)(*snapshot))
+            self.assertEqual(snapshot[0], getattr(entity, type(snapshot)._fields[0]))
+
+    def test_trip_and_rider_snapshot_delta(self):
+        """Test that trip and rider deltas restore through tuple snapshots."""
+        self.riders["R-001"] = Rider("R-001", "Rider", "A1")
+        self.trips["T-001"] = Trip("T-001", "R-001", "A1", "B1", "Zone-A", "Zone-B")
+        rider, trip = self.riders["R-001"], self.trips["T-001"]
+
+        self.manager.log_operation(
+            operation_type=OperationType.ASSIGN_TRIP,
+            description="Assign",
+            affected_rider_ids=["R-001"],
+            affected_trip_ids=["T-001"]
+        )
+        trip.assign_driver("D-001", 5.0, ["A1", "B1"])
+        rider.request_trip("T-001")
+        self.manager.log_operation(
+            operation_type=OperationType.UPDATE_DRIVER_LOCATION,
+            description="Move",
+            affected_driver_ids=["D-001"]
+        )
+
+        self.assertIsInstance(trip.create_snapshot(), tuple)
+        self.manager.rollback_k(2)
+        self.assertEqual(trip.state, TripState.REQUESTED)
+        self.assertIsNone(trip.driver_id)
+        self.assertEqual(len(trip.state_history), 1)
+        self.assertIsNone(rider.current_trip_id)
+
+    def test_creations_share_empty_snapshot(self):
+        """Test that operations with nothing to snapshot share one snapshot."""
+        for rider_id in ("R-001", "R-002"):
+            self.manager.log_operation(
+                operation_type=OperationType.CREATE_RIDER,
+                description="Create rider",
+                created_entity_id=rider_id,
+                created_entity_type="rider"
+            )
+            self.riders[rider_id] = Rider(rider_id, "Rider", "A1")
+
+        second, first = self.manager._operation_stack.get_history(2)
+        self.assertIs(first.before_snapshot, second.before_snapshot)
+        self.manager.rollback_k(2)
+        self.assertEqual(self.riders, {})
+
+    def test_location_update_captures_only_location(self):
+        """Test that a location update snapshots just the location fields."""
+        driver = self.drivers["D-001"]
+        driver.add_idle_time(5.0)
+        self.manager.log_operation(
+            operation_type=OperationType.UPDATE_DRIVER_LOCATION,
+            description="Move",
+            affected_driver_ids=["D-001"]
+        )
+        driver.update_location("B1", "Zone-B")
+
+        captured = self.manager._operation_stack.peek().before_snapshot.driver_snapshots
+        self.assertEqual(captured["D-001"].fields, {"current_location": "A1", "zone": "Zone-A"})
+        self.manager.rollback_last()
+        self.assertEqual((driver.current_location, driver.zone), ("A1", "Zone-A"))
+        self.assertEqual(driver.idle_time, 5.0)
+
+    def test_snapshot_delta_matches_replace(self):
+        """Test that applying a delta equals NamedTuple._replace."""
+        trip = Trip("T-001", "R-001", "A1", "B1", "Zone-A", "Zone-B")
+        current = trip.create_snapshot()
+        fields = {"driver_id": "D-001", "cost": 12.5}
+
+        restored = SnapshotDelta(fields).apply_to(current)
+        self.assertIs(type(restored), type(current))
+        self.assertEqual(restored, current._replace(**fields))
+
+    def test_operation_stack_evicts_oldest(self):
+        """Test that a full stack drops its oldest operation."""
+        manager = RollbackManager(max_operations=3)
+        manager.set_system_references(self.drivers, self.riders, self.trips)
+        op_ids = [
+            manager.log_operation(
+                operation_type=OperationType.UPDATE_DRIVER_LOCATION,
+                description=f"Move {i}",
+                affected_driver_ids=["D-001"]
+            )
+            for i in range(5)
+        ]
+
+        history = manager._operation_stack.get_history(10)
+        self.assertEqual([op.operation_id for op in history], op_ids[:1:-1])
+        self.assertEqual(manager._operation_stack.get_history(0), [])
+
+    def test_system_history_limit(self):
+        """Test that the system passes its history limit to the rollback log."""
+        system = RideShareSystem(max_operations=2)
+        driver = system.create_driver("Alice", "A1")
+        system.update_driver_location(driver.driver_id, "A2")
+        system.update_driver_location(driver.driver_id, "A3")
+
+        self.assertEqual(system._rollback_manager.get_operation_count(), 2)
+        self.assertEqual(len(system.rollback_k(5)), 2)
+        self.assertEqual(driver.current_location, "A1")
+
+        with self.assertRaises(ValueError):
+            RollbackManager(max_operations=0)
+
+    def test_operation_timestamp(self):
+        """Test that the stored nanosecond stamp converts back to a datetime."""
+        before = datetime.now().replace(microsecond=0)
+        self.manager.log_operation(
+            operation_type=OperationType.UPDATE_DRIVER_LOCATION,
+            description="Timed operation",
+            affected_driver_ids=["D-001"]
+        )
+        operation = self.manager.rollback_last()
+        
+        self.assertIsInstance(operation.timestamp_ns, int)
+        self.assertGreaterEqual(operation.timestamp, before)
+        self.assertLessEqual(operation.timestamp, datetime.now())
+
+    def test_history_timestamp_formatted_once(self):
+        """Test that history rows reuse the memoized ISO timestamp."""
+        self.manager.log_operation(
+            operation_type=OperationType.UPDATE_DRIVER_LOCATION,
+            description="Timed operation",
+            affected_driver_ids=["D-001"]
+        )
+        first = self.manager.get_history()[0]["timestamp"]
+        second = self.manager.get_history()[0]["timestamp"]
+
+        self.assertIs(first, second)
+        self.assertEqual(datetime.fromisoformat(first), self.manager._operation_stack.peek().timestamp)
+
+    def test_history_description_formatted_once(self):
+        """Test that a templated description is formatted on first read only."""
+        self.manager.log_operation(
+            operation_type=OperationType.UPDATE_DRIVER_LOCATION,
+            description="Move {} to {}",
+            affected_driver_ids=["D-001"],
+            description_args=("D-001", "B1")
+        )
+        first, = self.manager.get_history(1)
+        second, = self.manager.get_history(1)
+
+        self.assertEqual(first["description"], "Move D-001 to B1")
+        self.assertIs(first["description"], second["description"])
+
+    def test_operation_without_ids_shares_empty_tuple(self):
+        """Test that missing affected-ID lists default to the shared empty tuple."""
+        driver_ids = ["D-001"]
+        self.manager.log_operation(
+            operation_type=OperationType.UPDATE_DRIVER_LOCATION,
+            description="Move",
+            affected_driver_ids=driver_ids
+        )
+        operation = self.manager._operation_stack.peek()
+
+        self.assertEqual(operation.affected_driver_ids, ("D-001",))
+        self.assertIs(operation.affected_rider_ids, ())
+        self.assertIs(operation.affected_trip_ids, ())
+
+        # Neither the caller's list nor the history lists alias the log
+        driver_ids.append("D-002")
+        history = self.manager.get_history(1)[0]
+        self.assertEqual(history["affected_drivers"], ["D-001"])
+        self.assertEqual(history["affected_riders"], [])
+        history["affected_drivers"].clear()
+        self.assertEqual(operation.affected_driver_ids, ("D-001",))
 
 
 class TestEdgeCases(unittest.TestCase):
@@ -510,6 +1608,24 @@ class TestEdgeCases(unittest.TestCase):
         self.assertIsNone(result)
 
 
+class BatchedTextTestResult(unittest.TextTestResult):
+    """
+    TextTestResult that collects its per-test lines and failure reports
+    in memory and writes them to the real stream in one call.
+    """
+    
+    def __init__(self, stream, descriptions, verbosity, **kwargs):
+        self._target = stream
+        # Same writeln wrapper the runner uses, around an in-memory buffer
+        super().__init__(type(stream)(io.StringIO()), descriptions, verbosity, **kwargs)
+    
+    def printErrors(self):
+        """Report failures, then flush everything buffered so far."""
+        super().printErrors()
+        self._target.write(self.stream.getvalue())
+        self._target.flush()
+
+
 def run_tests():
     """Run all tests and print results."""
     # Create test suite
@@ -525,18 +1641,27 @@ def run_tests():
     suite.addTests(loader.loadTestsFromTestCase(TestRollbackManager))
     suite.addTests(loader.loadTestsFromTestCase(TestEdgeCases))
     
-    # Run tests
-    runner = unittest.TextTestRunner(verbosity=2)
+    # Run tests in this process. Most of the suite's time goes to the two
+    # threaded concurrency tests, so a process pool per test class could at
+    # best overlap those two. It would pay for the worker processes and
+    # interleave the verbose output.
+    # buffer=True captures anything the code under test prints and only
+    # replays it for failing tests
+    runner = unittest.TextTestRunner(
+        verbosity=2, buffer=True, resultclass=BatchedTextTestResult
+    )
     result = runner.run(suite)
     
-    # Print summary
-    print("\n" + "=" * 60)
-    print("TEST SUMMARY")
-    print("=" * 60)
-    print(f"Tests run: {result.testsRun}")
-    print(f"Failures: {len(result.failures)}")
-    print(f"Errors: {len(result.errors)}")
-    print(f"Success: {result.wasSuccessful()}")
+    # Print summary in one write
+    print("\n".join([
+        "\n" + "=" * 60,
+        "TEST SUMMARY",
+        "=" * 60,
+        f"Tests run: {result.testsRun}",
+        f"Failures: {len(result.failures)}",
+        f"Errors: {len(result.errors)}",
+        f"Success: {result.wasSuccessful()}"
+    ]))
     
     return result.wasSuccessful()
 